@@ -1,22 +1,93 @@
+import base64
+import difflib
+import gc
+import hashlib
+import importlib
 import json
+import multiprocessing
+import os
 import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from urllib.request import urlopen
 
+_START = time.perf_counter()
+
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 import plotly.io as pio
-from plotly.subplots import make_subplots
-from dash import Dash, dcc, html, Input, Output, State, callback_context
+from dash import Dash, dcc, html, Input, Output, State, Patch, ClientsideFunction, callback_context, no_update
+from dash.exceptions import PreventUpdate
 import dash_bootstrap_components as dbc
-import geopandas as gpd
 import numpy as np
 
-print("Lade Daten und initialisiere Dashboard...")
+
+# --------- STARTUP TIMING ---------
+# Seconds per startup phase in the order they finished (also served by /healthz)
+STARTUP_TIMES = OrderedDict()
+
+
+def record_phase(name, seconds):
+    STARTUP_TIMES[name] = round(seconds, 4)
+    print(f"[Start] {name}: {seconds * 1000:.0f} ms")
+
+
+@contextmanager
+def startup_phase(name):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - t0)
+
+
+class LazyModule:
+    """
+    Stand-in for a module (or one attribute of it) that is imported on first
+    use, so imports only the figures or the geo loader need do not slow down
+    worker start.
+    """
+
+    def __init__(self, name, attr=None):
+        self._name = name
+        self._attr = attr
+        self._target = None
+
+    def _load(self):
+        if self._target is None:
+            with startup_phase(f"import {self._name}"):
+                module = importlib.import_module(self._name)
+            self._target = getattr(module, self._attr) if self._attr else module
+        return self._target
+
+    def __getattr__(self, item):
+        return getattr(self._load(), item)
+
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
+
+px = LazyModule("plotly.express")
+make_subplots = LazyModule("plotly.subplots", "make_subplots")
+gpd = LazyModule("geopandas")
+shapely = LazyModule("shapely")
+# dash_bootstrap_components stays a real import: Dash collects the scripts of
+# the component libraries on its first request, before a lazy import could run.
+
+record_phase("imports", time.perf_counter() - _START)
 
 # Use a light Plotly template
 pio.templates.default = "plotly_white"
 
+# Cached frames are shared between callbacks; with copy-on-write a shallow copy
+# handed to figure code can never write through to the cached data.
+# (pandas >= 3 always behaves like this.)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 # --------- THEME COLORS ---------
 HEADER_BG = "#0F1A2A"
 HEADER_BORDER = "#1F2A3A"
@@ -129,83 +200,1563 @@ CRIME_SYNONYMS = {
     "Sachbeschädigung": "Sachbeschädigung",
 }
 
+TOTAL_CRIME = "Straftaten insgesamt"
+# Parent of every short crime name (see CRIME HIERARCHY). The rows of a parent
+# category already include the victims of its children.
+CRIME_PARENTS = {
+    "Gewaltkriminalität": TOTAL_CRIME,
+    "Mord & Totschlag": "Gewaltkriminalität",
+    "Mord": "Mord & Totschlag",
+    "Totschlag": "Mord & Totschlag",
+    "Sexualstraftaten": "Gewaltkriminalität",
+    "Raub & Erpressung": "Gewaltkriminalität",
+    "Raub Banken/Post": "Raub & Erpressung",
+    "Raub Geschäfte": "Raub & Erpressung",
+    "Handtaschenraub": "Raub & Erpressung",
+    "Raub auf Straßen": "Raub & Erpressung",
+    "Raub in Wohnungen": "Raub & Erpressung",
+    "Schwere KV": "Gewaltkriminalität",
+    "Einfache KV": TOTAL_CRIME,
+    "Widerstand/Angriff Beamte": TOTAL_CRIME,
+    "Widerstand gegen Beamte": "Widerstand/Angriff Beamte",
+    "Angriff auf Beamte": "Widerstand/Angriff Beamte",
+    "Missbrauch Kinder": TOTAL_CRIME,
+    "Diebstahl": TOTAL_CRIME,
+    "Betrug": TOTAL_CRIME,
+    "Cyberbetrug": "Betrug",
+    "Drogendelikte": TOTAL_CRIME,
+    "Sachbeschädigung": TOTAL_CRIME,
+}
+# Victims of a parent that none of its listed children covers form a derived
+# child category: the parent minus its children, computed from the cube by
+# CubeView.at_level and never stored as rows. Every level thereby sums up to
+# its parent, also where the source lists more child victims than parent ones
+# (the remainder is negative then).
+CRIME_REMAINDERS = {
+    ("Sonstige Straftaten" if parent == TOTAL_CRIME else f"Sonstige {parent}"): parent
+    for parent in sorted({TOTAL_CRIME, *CRIME_PARENTS.values()})
+}
+# Levels of the hierarchy by depth: total -> groups -> offences -> details
+CRIME_LEVELS = ("total", "group", "offence", "detail")
+LEVEL_TOTAL, LEVEL_GROUP, LEVEL_OFFENCE, LEVEL_DETAIL = CRIME_LEVELS
+
+
+# --------- CRIME NAME MAPPING ---------
+def _encoding_variants(ch: str):
+    """Spellings a non-ASCII character can take after a latin1/UTF-8 mix-up."""
+    variants = {ch, "\ufffd"}
+    for codec in ("latin1", "cp1252"):
+        try:
+            variants.add(ch.encode("utf-8").decode(codec))  # e.g. "ö" -> "Ã¶"
+        except UnicodeError:
+            pass
+    return sorted(variants, key=len, reverse=True)
+
+
+def _synonym_regex(long_name: str) -> str:
+    parts = []
+    for ch in long_name:
+        if ord(ch) < 128:
+            parts.append(re.escape(ch))
+        else:
+            parts.append("(?:" + "|".join(map(re.escape, _encoding_variants(ch))) + ")")
+    return "".join(parts)
+
+
+# One lookahead alternation with a capture group per CRIME_SYNONYMS key (in dict
+# order). finditer() reports a match at every position where some key starts and,
+# at each position, the group of the first key that matches there.
+_CRIME_MATCHER = re.compile(
+    "(?=(?:" + "|".join(f"({_synonym_regex(k)})" for k in CRIME_SYNONYMS) + "))"
+)
+_CRIME_SHORT_NAMES = list(CRIME_SYNONYMS.values())
+
+
+def shorten_crime_name(s: str) -> str:
+    """
+    Short display name for one Straftat string. The first CRIME_SYNONYMS key
+    contained in s wins, exactly like walking the dict in order.
+    """
+    s = s.strip()
+    hits = [m.lastindex for m in _CRIME_MATCHER.finditer(s)]
+    if hits:
+        return _CRIME_SHORT_NAMES[min(hits) - 1]
+
+    # fallback: clean & shorten safely if unknown
+    return s.replace("  ", " ").strip()
+
+
+def shorten_crime_names(values):
+    """
+    Vectorized shorten_crime_name: every distinct value is resolved once and the
+    result is broadcast back through the factorized codes.
+    """
+    codes, uniques = pd.factorize(values)
+    # sorted categories, so groupby on the result orders like on plain strings
+    short_codes, short_uniques = pd.factorize(
+        np.array([shorten_crime_name(str(u)) for u in uniques], dtype=object),
+        sort=True,
+    )
+    # -1 (missing Straftat) must stay missing instead of wrapping around
+    codes = np.where(codes >= 0, short_codes.take(codes, mode="clip"), -1)
+    return pd.Categorical.from_codes(codes, categories=short_uniques)
+
+
+# --------- CRIME HIERARCHY ---------
+class CrimeHierarchy:
+    """
+    Tree of the Straftat_kurz categories present in the data (CRIME_PARENTS).
+
+    The source rows overlap: "Straftaten insgesamt" contains every other
+    category, "Gewaltkriminalität" contains the Raub rows, "Raub & Erpressung"
+    its sub-rows and so on. Any sum across categories must therefore use a set
+    in which no category contains another; level_nodes() picks that set for a
+    level of CRIME_LEVELS. The sets for the unfiltered data are computed here,
+    the ones for crime filters on first use.
+
+    Every parent gets its CRIME_REMAINDERS category as an extra child
+    (`remainders` maps it to the parent); it has no rows of its own.
+    """
+
+    def __init__(self, categories, parents=CRIME_PARENTS):
+        present = set(categories)
+        self.parent = {}
+        for cat in sorted(present):
+            # skip ancestors that do not occur in the data
+            parent = self._declared_parent(cat, parents)
+            while parent is not None and parent not in present:
+                parent = self._declared_parent(parent, parents)
+            self.parent[cat] = parent
+        remainder_of = {parent: name for name, parent in CRIME_REMAINDERS.items()}
+        self.remainders = {
+            remainder_of[parent]: parent
+            for parent in set(self.parent.values()) - {None}
+            if parent in remainder_of
+        }
+        self.parent.update(self.remainders)
+        self.categories = sorted(self.parent)
+        self.children = {cat: [] for cat in self.categories}
+        for cat, parent in self.parent.items():
+            if parent is not None:
+                self.children[parent].append(cat)
+        self.depth = {cat: len(self.ancestors(cat)) for cat in self.categories}
+        self._levels = {}
+        for level in CRIME_LEVELS:
+            self.level_nodes(level)
+
+    @staticmethod
+    def _declared_parent(cat, parents):
+        # unknown categories hang directly below the total
+        if cat == TOTAL_CRIME:
+            return None
+        return parents.get(cat, TOTAL_CRIME)
+
+    def ancestors(self, cat):
+        out = []
+        parent = self.parent.get(cat)
+        while parent is not None:
+            out.append(parent)
+            parent = self.parent[parent]
+        return out
+
+    def subtree(self, roots):
+        """The categories `roots` and everything below them."""
+        roots = set(roots)
+        return [c for c in self.categories if c in roots or roots.intersection(self.ancestors(c))]
+
+    def level_nodes(self, level, selected=()):
+        """
+        Categories to sum at `level` for a crime filter (empty = everything):
+        the level's categories inside the selected subtrees, plus selected
+        categories below the level that no other selected category contains.
+        Leaves above the level stand in for it. No category of the result
+        contains another one.
+        """
+        key = (level, tuple(sorted(set(selected))))
+        nodes = self._levels.get(key)
+        if nodes is not None:
+            return nodes
+        depth = CRIME_LEVELS.index(level)
+        chosen = set(key[1]) or set(self.categories)
+        nodes = []
+        for cat in self.categories:
+            covered = cat in chosen or chosen.intersection(self.ancestors(cat))
+            on_level = self.depth[cat] == depth or (
+                self.depth[cat] < depth and not self.children[cat]
+            )
+            if covered and on_level:
+                nodes.append(cat)
+            elif cat in chosen and self.depth[cat] > depth and not chosen.intersection(self.ancestors(cat)):
+                nodes.append(cat)
+        # categories unknown to the hierarchy match nothing, but stay selected
+        nodes.extend(c for c in key[1] if c not in self.parent)
+        nodes = tuple(nodes)
+        self._levels[key] = nodes
+        return nodes
+
 
 # --------- LOAD DATA ---------
-def load_data():
-    dfs = []
-    for year in range(2019, 2025):
-        df = pd.read_csv(f"{year} Opfer.csv", sep=";", encoding="latin1")
-        df.columns = [c.strip() for c in df.columns]  # removes trailing spaces
-        df["Jahr"] = year
-        dfs.append(df)
-
-    df_all = pd.concat(dfs, ignore_index=True)
-    df_all["Bundesland_Code"] = (df_all["Gemeindeschluessel"] // 1000).astype(int)
-    df_all["Bundesland"] = df_all["Bundesland_Code"].map(STATE_MAP)
+DATA_YEARS = range(2019, 2025)
+CACHE_DIR = ".cache"
+# Bump when the preparation steps in _load_data_from_csv change in a way that
+# is not visible in STATE_MAP / CRIME_SYNONYMS.
+DATA_CACHE_VERSION = 5
+# Upper bound for the per-year ingest process pool (see _read_year_csvs)
+INGEST_MAX_WORKERS = int(os.environ.get("CRIME_DASH_INGEST_WORKERS", "8"))
+INGEST_CHUNK_ROWS = 8192
+
+# Victim count columns the dashboard reads (names after stripping whitespace)
+COUNT_COLS = [
+    "Oper insgesamt",
+    "Opfer maennlich",
+    "Opfer weiblich",
+    *AGE_COLS.values(),
+]
+# Columns parsed from the CSVs; everything else is skipped while reading
+DATA_COLUMNS = ["Straftat", "Gemeindeschluessel", "Stadt/Landkreis", "Fallstatus", *COUNT_COLS]
+# String dimensions of the prepared frame, stored as categoricals
+DIMENSION_COLS = ["Straftat", "Straftat_kurz", "Region", "Bundesland", "Fallstatus"]
+
+
+def _source_csv_paths():
+    return [f"{year} Opfer.csv" for year in DATA_YEARS]
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _file_fingerprint(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": _file_sha256(path)}
+
+
+def _prep_key():
+    """Hash of everything besides the CSVs that shapes the prepared frame."""
+    payload = json.dumps(
+        [DATA_CACHE_VERSION, STATE_MAP, CRIME_SYNONYMS],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_is_valid(manifest, paths, prep_key=None):
+    """
+    A cached frame is valid if the preparation key matches and every source file
+    is unchanged. size+mtime is checked first; only if they differ is the file
+    re-hashed, so a plain `touch` does not throw the cache away.
+    """
+    if manifest.get("prep_key") != (prep_key or _prep_key()):
+        return False
+    sources = manifest.get("sources", {})
+    if sorted(sources) != sorted(paths):
+        return False
+    for path in paths:
+        fp = sources[path]
+        try:
+            st = os.stat(path)
+        except OSError:
+            return False
+        if st.st_size != fp["size"]:
+            return False
+        if st.st_mtime_ns != fp["mtime_ns"] and _file_sha256(path) != fp["sha256"]:
+            return False
+    return True
+
+
+def _refresh_mtimes(manifest, paths):
+    """
+    Store the current mtime_ns of `paths` in a manifest that _cache_is_valid()
+    accepted. Returns True if one changed, i.e. a touched file was re-hashed
+    and the manifest should be rewritten so the next start skips the hash.
+    """
+    changed = False
+    for path in paths:
+        mtime_ns = os.stat(path).st_mtime_ns
+        if manifest["sources"][path]["mtime_ns"] != mtime_ns:
+            manifest["sources"][path]["mtime_ns"] = mtime_ns
+            changed = True
+    return changed
+
+
+def _data_cache_paths(name="opfer"):
+    return (
+        os.path.join(CACHE_DIR, f"{name}.parquet"),
+        os.path.join(CACHE_DIR, f"{name}.manifest.json"),
+    )
+
+
+def _read_data_cache(paths, name="opfer", prep_key=None, reader=pd.read_parquet):
+    data_path, manifest_path = _data_cache_paths(name)
+    try:
+        with open(manifest_path, encoding="utf-8") as fh:
+            manifest = json.load(fh)
+        if not _cache_is_valid(manifest, paths, prep_key):
+            return None
+        frame = reader(data_path)
+    except (OSError, ValueError, KeyError, ImportError):
+        return None
+    try:
+        if _refresh_mtimes(manifest, paths):
+            _write_atomically(manifest_path, lambda tmp: _write_json(tmp, manifest))
+    except OSError as e:
+        print(f"Hinweis: Daten-Cache-Manifest konnte nicht aktualisiert werden: {e}")
+    return frame
+
+
+def _write_atomically(path, write):
+    """
+    write(tmp_path) into a temp file next to `path`, then rename it over
+    `path`. The temp name carries pid and thread, so processes or threads
+    writing the same cache at once never share a temp file, and readers see
+    either the old or the complete new file.
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _write_json(path, payload):
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, ensure_ascii=False, indent=1)
+
+
+def _write_data_cache(df_prepared, paths, name="opfer", prep_key=None):
+    data_path, manifest_path = _data_cache_paths(name)
+    manifest = {
+        "prep_key": prep_key or _prep_key(),
+        "sources": {path: _file_fingerprint(path) for path in paths},
+    }
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # the data first: a manifest never describes a file that is not there yet
+        _write_atomically(data_path, lambda tmp: df_prepared.to_parquet(tmp, index=False))
+        _write_atomically(manifest_path, lambda tmp: _write_json(tmp, manifest))
+    except (OSError, ValueError, ImportError) as e:
+        print(f"Hinweis: Daten-Cache konnte nicht geschrieben werden: {e}")
+
+
+def _downcast_counts(chunk):
+    """Store victim counts in the smallest unsigned type that holds this chunk's values."""
+    for col in COUNT_COLS:
+        if col in chunk.columns:
+            chunk[col] = pd.to_numeric(chunk[col], downcast="unsigned")
+    return chunk
+
+
+def _read_year_csv(year):
+    """
+    Parse and normalize one yearly CSV. Top-level so it can run in a worker process.
+
+    The file is streamed in chunks of INGEST_CHUNK_ROWS rows: only DATA_COLUMNS are
+    parsed, rows other than Fallstatus "insg." are dropped and counts are downcast
+    per chunk, so the full 31-column voll./vers./insg. table never exists in memory.
+    """
+    wanted = set(DATA_COLUMNS)
+    reader = pd.read_csv(
+        f"{year} Opfer.csv",
+        sep=";",
+        encoding="latin1",
+        usecols=lambda c: c.strip() in wanted,  # header names carry trailing spaces
+        chunksize=INGEST_CHUNK_ROWS,
+    )
+    chunks = []
+    with reader:
+        for chunk in reader:
+            chunk.columns = [c.strip() for c in chunk.columns]  # removes trailing spaces
+            # insg. is the largest value per offence, so downcasting before the
+            # filter picks the same types and avoids writing into a filtered view
+            chunk = _downcast_counts(chunk)
+            chunks.append(chunk[chunk["Fallstatus"] == "insg."])
+
+    # concat upcasts to the widest chunk dtype, which is still the smallest safe one
+    df = pd.concat(chunks, ignore_index=True)
+    df["Jahr"] = year
+    return df
+
+
+def _ingest_workers(n_files):
+    """Number of worker processes for the parallel ingest (1 = sequential)."""
+    if "fork" not in multiprocessing.get_all_start_methods():
+        # spawned workers would re-import app.py and load everything again
+        return 1
+    if threading.active_count() > 1:
+        # forking while other threads run (request threads, the geo loader) can
+        # leave locks they hold locked forever in the children
+        return 1
+    return max(1, min(n_files, os.cpu_count() or 1, INGEST_MAX_WORKERS))
+
+
+def _read_year_csvs(parallel=True):
+    years = list(DATA_YEARS)
+    workers = _ingest_workers(len(years)) if parallel else 1
+    if workers <= 1:
+        return [_read_year_csv(year) for year in years]
+
+    ctx = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        return list(pool.map(_read_year_csv, years))
+
+
+def _load_data_from_csv(parallel=True):
+    # the per-year frames are already filtered to Fallstatus "insg." and projected
+    # to DATA_COLUMNS, so this concat is the only copy of the final rows
+    df_insg = pd.concat(_read_year_csvs(parallel), ignore_index=True)
+    df_insg["Bundesland_Code"] = (df_insg["Gemeindeschluessel"] // 1000).astype("uint8")
+    df_insg["Bundesland"] = df_insg["Bundesland_Code"].map(STATE_MAP)
     
-    # Create a proper Region column (Stadt/Landkreis)
-    if "Stadt/Landkreis" in df_all.columns:
-        df_all["Region"] = df_all["Stadt/Landkreis"]
+    # Create a proper Region column (Stadt/Landkreis). The source column is
+    # renamed rather than copied so the names are held only once.
+    if "Stadt/Landkreis" in df_insg.columns:
+        df_insg = df_insg.rename(columns={"Stadt/Landkreis": "Region"})
     else:
         # Fallback if column name is different
-        df_all["Region"] = "Unbekannt"
+        df_insg["Region"] = "Unbekannt"
 
-    df_insg = df_all[df_all["Fallstatus"] == "insg."].copy()
+    df_insg["Straftat_kurz"] = shorten_crime_names(df_insg["Straftat"])
+    return _compact_frame(df_insg)
 
-    def short(s: str) -> str:
-            s = s.strip()
 
-            for long_name, short_name in CRIME_SYNONYMS.items():
-                if long_name in s:
-                    return short_name
+def _compact_frame(frame):
+    """
+    Compact in-memory layout: string dimensions as categoricals, counts and keys
+    in the narrowest unsigned integer type that holds them.
+    """
+    for col in DIMENSION_COLS:
+        if col in frame.columns and not isinstance(frame[col].dtype, pd.CategoricalDtype):
+            frame[col] = frame[col].astype("category")
+    for col in [*COUNT_COLS, "Gemeindeschluessel", "Jahr", "Bundesland_Code"]:
+        if col in frame.columns:
+            frame[col] = pd.to_numeric(frame[col], downcast="unsigned")
+    return frame
 
-    # fallback: clean & shorten safely if unknown
-            return s.replace("  ", " ").strip()
 
-    df_insg["Straftat_kurz"] = df_insg["Straftat"].apply(short)
-    return df_insg
+def memory_report(frame):
+    """Memory footprint per column (bytes, including string/category payloads)."""
+    usage = frame.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({"dtype": frame.dtypes.astype(str), "bytes": usage})
+    return report.sort_values("bytes", ascending=False)
+
+
+def load_data(use_cache=True, parallel=True):
+    """
+    Load the prepared victim frame. The result of _load_data_from_csv is kept as
+    Parquet in CACHE_DIR and reused as long as the source CSVs are unchanged.
+    With parallel=True the yearly CSVs are parsed concurrently in a process pool.
+    """
+    paths = _source_csv_paths()
+    if use_cache:
+        cached = _read_data_cache(paths)
+        if cached is not None:
+            print("Daten aus Cache geladen.")
+            return cached
+
+    df_prepared = _load_data_from_csv(parallel)
+    if use_cache:
+        _write_data_cache(df_prepared, paths)
+    return df_prepared
+
+
+# --------- FILTER INDEX ---------
+# Columns behind the sidebar filters (years, crimes, states)
+FILTER_DIMENSIONS = ("Jahr", "Straftat_kurz", "Bundesland")
+
+
+def _plain(value):
+    """numpy scalar -> Python scalar, so dict lookups with dropdown values are exact."""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class FilterIndex:
+    """
+    Inverted index from each filter value to the sorted row ids that carry it.
+
+    A selection is answered by merging the posting lists of the selected values
+    per dimension, intersecting the dimensions (smallest list first) and one
+    `take` on the frame, so the work depends on the number of matching rows
+    rather than on the size of the frame.
+    """
+
+    def __init__(self, frame, columns=FILTER_DIMENSIONS):
+        self.frame = frame
+        self.postings = {}
+        for col in columns:
+            groups = frame.groupby(col, observed=True).indices
+            self.postings[col] = {
+                _plain(value): np.asarray(rows, dtype=np.int64)
+                for value, rows in groups.items()
+            }
+
+    def rows(self, col, values):
+        """Sorted row ids whose `col` is one of `values`."""
+        postings = self.postings[col]
+        lists = [postings[v] for v in set(values) if v in postings]
+        if not lists:
+            return np.empty(0, dtype=np.int64)
+        if len(lists) == 1:
+            return lists[0]
+        # posting lists of different values are disjoint
+        return np.sort(np.concatenate(lists))
+
+    def select(self, **selections):
+        """Rows matching every non-empty selection, e.g. select(Jahr=[2019])."""
+        lists = [self.rows(col, values) for col, values in selections.items() if values]
+        if not lists:
+            return self.frame
+
+        lists.sort(key=len)
+        row_ids = lists[0]
+        for other in lists[1:]:
+            if row_ids.size == 0:
+                break
+            row_ids = np.intersect1d(row_ids, other, assume_unique=True)
+        return self.frame.take(row_ids)
+
+
+# --------- AGGREGATE CUBE ---------
+class AggregateCube:
+    """
+    Dense sums of every COUNT_COLS metric over [Jahr, Straftat_kurz, Region].
+
+    The region axis holds the distinct (Gemeindeschluessel, Region) pairs; Region
+    names and Bundesland are labels on that axis, so grouping by them is a
+    reduction along it. A parallel row-count cube records which cells exist in
+    the source frame, which keeps groupby's "observed groups only" semantics.
+    """
+
+    def __init__(self, frame, metrics=COUNT_COLS):
+        self.metrics = [m for m in metrics if m in frame.columns]
 
+        year_codes, self.years = pd.factorize(frame["Jahr"], sort=True)
+        crime_codes, self.crimes = pd.factorize(frame["Straftat_kurz"], sort=True)
+        region_codes, region_pairs = pd.factorize(
+            pd.MultiIndex.from_arrays([frame["Gemeindeschluessel"], frame["Region"]]),
+            sort=True,
+        )
+        self.years = np.asarray(self.years)
+        self.crimes = np.asarray(self.crimes, dtype=object)
+
+        region_names = region_pairs.get_level_values(1).astype(str)
+        self.region_name_codes, self.region_names = pd.factorize(region_names, sort=True)
+        self.region_names = np.asarray(self.region_names, dtype=object)
+
+        region_states = (
+            (region_pairs.get_level_values(0).to_numpy() // 1000).astype(int)
+        )
+        region_states = pd.Series(region_states).map(STATE_MAP)
+        self.region_state_codes, self.states = pd.factorize(region_states, sort=True)
+        self.states = np.asarray(self.states, dtype=object)
+
+        # (Region, Bundesland) pairs for figures that group by both
+        pair_codes, pairs = pd.factorize(
+            pd.MultiIndex.from_arrays([self.region_names[self.region_name_codes], region_states]),
+            sort=True,
+        )
+        self.region_pair_codes = pair_codes
+        self.region_pairs = pairs
+
+        shape = (len(self.years), len(self.crimes), len(region_pairs))
+        index = (year_codes, crime_codes, region_codes)
+        self.values = np.zeros(shape + (len(self.metrics),), dtype=np.int64)
+        np.add.at(self.values, index, frame[self.metrics].to_numpy(dtype=np.int64))
+        self.rows = np.zeros(shape, dtype=np.int32)
+        np.add.at(self.rows, index, 1)
+
+    def nbytes(self):
+        return self.values.nbytes + self.rows.nbytes
+
+    def save(self, path, manifest):
+        """
+        Write the cube as a snapshot file (see CUBE SNAPSHOT): the labels and
+        `manifest` go into the JSON header, the arrays follow as raw bytes.
+        """
+        pairs = self.region_pairs
+        header = {
+            **manifest,
+            "version": CUBE_SNAPSHOT_VERSION,
+            "metrics": self.metrics,
+            "crimes": [str(c) for c in self.crimes],
+            "region_names": [str(r) for r in self.region_names],
+            "states": [str(s) for s in self.states],
+            "region_pairs": [
+                [str(name), None if pd.isna(state) else str(state)]
+                for name, state in zip(pairs.get_level_values(0), pairs.get_level_values(1))
+            ],
+            "arrays": {},
+        }
+        offset = 0
+        for name in CUBE_ARRAYS:
+            arr = np.ascontiguousarray(getattr(self, name))
+            header["arrays"][name] = {"dtype": arr.dtype.str, "shape": list(arr.shape), "offset": offset}
+            offset = _align(offset + arr.nbytes)
+        head = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        start = _align(len(CUBE_MAGIC) + 8 + len(head))
+
+        with open(path, "wb") as fh:
+            fh.write(CUBE_MAGIC)
+            fh.write(len(head).to_bytes(8, "little"))
+            fh.write(head)
+            for name in CUBE_ARRAYS:
+                fh.seek(start + header["arrays"][name]["offset"])
+                fh.write(np.ascontiguousarray(getattr(self, name)).tobytes())
+            fh.truncate(start + offset)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Map a snapshot written by save() read-only. Returns (cube, header); the
+        arrays are views into one np.memmap of the file, so the data is read
+        lazily and shared through the page cache by every process mapping it.
+        """
+        with open(path, "rb") as fh:
+            if fh.read(len(CUBE_MAGIC)) != CUBE_MAGIC:
+                raise ValueError(f"{path} ist kein Cube-Snapshot")
+            size = int.from_bytes(fh.read(8), "little")
+            header = json.loads(fh.read(size).decode("utf-8"))
+        if header.get("version") != CUBE_SNAPSHOT_VERSION:
+            raise ValueError(f"{path}: Snapshot-Version {header.get('version')}")
+        if set(header["arrays"]) != set(CUBE_ARRAYS):
+            raise ValueError(f"{path}: unerwartete Arrays {sorted(header['arrays'])}")
+        start = _align(len(CUBE_MAGIC) + 8 + size)
+        buf = np.memmap(path, dtype=np.uint8, mode="r")
+
+        cube = cls.__new__(cls)
+        for name, spec in header["arrays"].items():
+            arr = np.ndarray(
+                tuple(spec["shape"]),
+                dtype=np.dtype(spec["dtype"]),
+                buffer=buf,
+                offset=start + spec["offset"],
+            )
+            setattr(cube, name, arr)
+        cube.metrics = header["metrics"]
+        cube.crimes = np.asarray(header["crimes"], dtype=object)
+        cube.region_names = np.asarray(header["region_names"], dtype=object)
+        cube.states = np.asarray(header["states"], dtype=object)
+        names, states = zip(*header["region_pairs"]) if header["region_pairs"] else ((), ())
+        cube.region_pairs = pd.MultiIndex.from_arrays(
+            [pd.Index(names, dtype=object), pd.Index(states, dtype=object)]
+        )
+        return cube, header
 
-df = load_data()
-YEARS = sorted(df["Jahr"].unique())
-CRIME_SHORT = sorted(df["Straftat_kurz"].unique())
-STATES = sorted(df["Bundesland"].dropna().unique())
+    def view(self, years=None, crimes=None, states=None):
+        """Sub-cube for a sidebar selection (empty/None = no restriction)."""
+        return CubeView(self, years, crimes, states)
+
+
+class CubeView:
+    """
+    A selection of an AggregateCube, answering groupby-sum style queries.
+
+    `remainders` adds derived crime categories after the selected ones, as
+    (label, parent position, child positions) on the cube's crime axis: the
+    parent minus its children, in the cells where the parent has rows.
+    """
+
+    def __init__(self, cube, years=None, crimes=None, states=None, remainders=()):
+        self.cube = cube
+        self.selection = (years, crimes, states)
+        self._levels = {}
+        self.year_idx = self._positions(cube.years, years)
+        self.crime_idx = self._positions(cube.crimes, crimes)
+        self.remainders = list(remainders)
+        self.crime_labels = np.concatenate(
+            [cube.crimes[self.crime_idx], np.array([r[0] for r in self.remainders], dtype=object)]
+        )
+        region_idx = np.arange(len(cube.region_state_codes))
+        if states:
+            state_idx = self._positions(cube.states, states)
+            region_idx = region_idx[np.isin(cube.region_state_codes, state_idx)]
+        self.region_idx = region_idx
+
+    @staticmethod
+    def _positions(labels, wanted):
+        if not wanted:
+            return np.arange(len(labels))
+        return np.flatnonzero(pd.Index(labels).isin(list(wanted)))
+
+    def at_level(self, level):
+        """
+        The same selection restricted to the crime categories of a hierarchy
+        level (CrimeHierarchy.level_nodes), so sums over crimes never count a
+        victim twice.
+        """
+        view = self._levels.get(level)
+        if view is None:
+            years, crimes, states = self.selection
+            nodes = CRIME_HIERARCHY.level_nodes(level, crimes or ())
+            real = [node for node in nodes if node not in CRIME_HIERARCHY.remainders]
+            remainders = self.remainder_terms(self.cube, nodes)
+            view = self._levels[level] = CubeView(self.cube, years, real, states, remainders)
+        return view
+
+    @staticmethod
+    def remainder_terms(cube, names):
+        """The `remainders` argument for the CRIME_HIERARCHY remainders among `names`."""
+        tree = CRIME_HIERARCHY
+        position = {crime: i for i, crime in enumerate(cube.crimes)}
+        terms = []
+        for name in names:
+            parent = tree.remainders.get(name)
+            if parent in position:
+                children = [position[c] for c in tree.children[parent] if c in position]
+                terms.append((name, position[parent], children))
+        return terms
+
+    def _subcube(self, metrics):
+        cube = self.cube
+        ix = np.ix_(self.year_idx, self.crime_idx, self.region_idx)
+        metric_idx = [cube.metrics.index(m) for m in metrics]
+        values, rows = cube.values[ix][..., metric_idx], cube.rows[ix]
+        if not self.remainders:
+            return values, rows
+        values, rows = [values], [rows]
+        for _, parent, children in self.remainders:
+            parent_ix = np.ix_(self.year_idx, [parent], self.region_idx)
+            children_ix = np.ix_(self.year_idx, children, self.region_idx)
+            has_parent = cube.rows[parent_ix] > 0
+            rest = (
+                cube.values[parent_ix][..., metric_idx]
+                - cube.values[children_ix][..., metric_idx].sum(axis=1, keepdims=True)
+            )
+            values.append(np.where(has_parent[..., None], rest, 0))
+            rows.append(has_parent.astype(cube.rows.dtype))
+        return np.concatenate(values, axis=1), np.concatenate(rows, axis=1)
+
+    @property
+    def empty(self):
+        _, rows = self._subcube([])
+        return not rows.any()
+
+    def totals(self, metrics="Oper insgesamt"):
+        """Sum over the whole selection: scalar for one metric, Series for a list."""
+        single = isinstance(metrics, str)
+        metrics = [metrics] if single else list(metrics)
+        values, _ = self._subcube(metrics)
+        sums = values.reshape(-1, len(metrics)).sum(axis=0)
+        return sums[0] if single else pd.Series(sums, index=metrics)
+
+    def observed(self, dim):
+        """Distinct values of Jahr / Straftat_kurz that have rows in the selection."""
+        _, rows = self._subcube([])
+        if dim == "Jahr":
+            return self.cube.years[self.year_idx[rows.any(axis=(1, 2))]]
+        if dim == "Straftat_kurz":
+            return self.crime_labels[rows.any(axis=(0, 2))]
+        raise ValueError(f"unknown dimension {dim!r}")
+
+    def sum_by(self, by, metrics="Oper insgesamt"):
+        """
+        Equivalent of frame.groupby(by, observed=True)[metrics].sum().reset_index()
+        for by in Jahr, Straftat_kurz, Region and Bundesland (or a list of them).
+        Use at_level() first when the selection holds overlapping categories.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        metrics = [metrics] if isinstance(metrics, str) else list(metrics)
+        cube = self.cube
+        values, rows = self._subcube(metrics)
+
+        region_dims = [b for b in by if b in ("Region", "Bundesland")]
+        if region_dims == ["Region"]:
+            codes, labels = cube.region_name_codes, [cube.region_names]
+        elif region_dims == ["Bundesland"]:
+            codes, labels = cube.region_state_codes, [cube.states]
+        elif region_dims:
+            codes = cube.region_pair_codes
+            pairs = cube.region_pairs
+            labels = [pairs.get_level_values(0).to_numpy(dtype=object),
+                      pairs.get_level_values(1).to_numpy(dtype=object)]
+            if region_dims[0] == "Bundesland":
+                labels = labels[::-1]
+        else:
+            codes, labels = None, []
+
+        # reduce the axes that are not grouped on
+        keep = ["Jahr" in by, "Straftat_kurz" in by, bool(region_dims)]
+        drop_axes = tuple(axis for axis, k in enumerate(keep) if not k)
+        values = values.sum(axis=drop_axes)
+        rows = rows.sum(axis=drop_axes)
+
+        axis_labels = []
+        if keep[0]:
+            axis_labels.append(("Jahr", cube.years[self.year_idx]))
+        if keep[1]:
+            axis_labels.append(("Straftat_kurz", self.crime_labels))
+        if keep[2]:
+            # group the region axis (now the last group axis) by the label codes
+            region_codes = codes[self.region_idx]
+            valid = region_codes >= 0
+            n_groups = int(codes.max()) + 1 if len(codes) else 0
+            grouped = np.zeros(values.shape[:-2] + (n_groups, len(metrics)), dtype=values.dtype)
+            grouped_rows = np.zeros(rows.shape[:-1] + (n_groups,), dtype=rows.dtype)
+            np.add.at(np.moveaxis(grouped, -2, 0), region_codes[valid], np.moveaxis(values[..., valid, :], -2, 0))
+            np.add.at(np.moveaxis(grouped_rows, -1, 0), region_codes[valid], np.moveaxis(rows[..., valid], -1, 0))
+            values, rows = grouped, grouped_rows
+            axis_labels.append((tuple(region_dims), labels))
+
+        # flatten the observed cells into a long frame
+        cells = np.nonzero(rows)
+        out = {}
+        for (name, lab), pos in zip(axis_labels, cells):
+            if isinstance(name, tuple):
+                for n, l in zip(name, lab):
+                    out[n] = np.asarray(l)[pos]
+            else:
+                out[name] = lab[pos]
+        result = pd.DataFrame(out, columns=by)
+        for i, m in enumerate(metrics):
+            result[m] = values[cells + (i,)]
+        return result.sort_values(by, kind="stable", ignore_index=True)
+
+
+# --------- CUBE SNAPSHOT ---------
+# The cube is kept on disk as one versioned, memory-mappable file:
+#   CUBE_MAGIC | header length (uint64 LE) | JSON header | padding | arrays
+# The header holds the dimension labels, the array table (dtype, shape, offset
+# from the first array) and the fingerprint of the source CSVs; every array
+# starts on a CUBE_ALIGN boundary. Bump CUBE_SNAPSHOT_VERSION when the layout
+# or the meaning of the arrays changes.
+CUBE_SNAPSHOT_VERSION = 1
+CUBE_MAGIC = b"CRIMECUBE\0"
+CUBE_ALIGN = 64
+CUBE_ARRAYS = ("years", "values", "rows", "region_name_codes", "region_state_codes", "region_pair_codes")
+
+
+def _align(n):
+    return -(-n // CUBE_ALIGN) * CUBE_ALIGN
+
+
+def _cube_prep_key():
+    """_prep_key() plus everything that shapes the cube arrays."""
+    payload = json.dumps([_prep_key(), CUBE_SNAPSHOT_VERSION, COUNT_COLS], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def cube_snapshot_path():
+    return os.path.join(CACHE_DIR, f"cube.v{CUBE_SNAPSHOT_VERSION}.bin")
+
+
+def _refresh_cube_snapshot(path, cube, header, paths, prep_key):
+    """Rewrite the snapshot with the current mtimes after a touched source was re-hashed."""
+    if not _refresh_mtimes(header, paths):
+        return
+    manifest = {"prep_key": prep_key, "sources": header["sources"]}
+    try:
+        # the mapped arrays keep the old file open; the new one is renamed over it
+        _write_atomically(path, lambda tmp: cube.save(tmp, manifest))
+    except OSError as e:
+        print(f"Hinweis: Cube-Snapshot konnte nicht aktualisiert werden: {e}")
+
+
+def load_cube(frame, use_cache=True):
+    """
+    AggregateCube of `frame`. With use_cache the cube is mapped from the
+    snapshot in CACHE_DIR when it was built from the current source CSVs;
+    otherwise it is built and the snapshot (re)written for the next process.
+    """
+    paths, prep_key = _source_csv_paths(), _cube_prep_key()
+    path = cube_snapshot_path()
+    if use_cache:
+        try:
+            cube, header = AggregateCube.load(path)
+            if _cache_is_valid(header, paths, prep_key):
+                print("Cube aus Snapshot gemappt.")
+                _refresh_cube_snapshot(path, cube, header, paths, prep_key)
+                return cube
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    cube = AggregateCube(frame)
+    if use_cache:
+        manifest = {
+            "prep_key": prep_key,
+            "sources": {p: _file_fingerprint(p) for p in paths},
+        }
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            # renamed into place, so readers never map a partial file
+            _write_atomically(path, lambda tmp: cube.save(tmp, manifest))
+        except (OSError, ValueError) as e:
+            print(f"Hinweis: Cube-Snapshot konnte nicht geschrieben werden: {e}")
+    return cube
+
+
+# --------- DATA STATE ---------
+# Filled by init_data(). Importing app.py does not touch the data, so workers
+# start fast; ensure_data() runs before the first request is handled.
+df = None
+YEARS = CRIME_SHORT = STATES = None
+FILTER_INDEX = CUBE = CRIME_HIERARCHY = None
+_DATA_LOCK = threading.Lock()
+
+
+def init_data():
+    """Load the victim frame and build everything derived from it."""
+    global df, YEARS, CRIME_SHORT, STATES, FILTER_INDEX, CUBE, CRIME_HIERARCHY
+    print("Lade Daten und initialisiere Dashboard...")
+    with startup_phase("data: load"):
+        frame = load_data()
+    print(f"Datensatz im Speicher: {memory_report(frame)['bytes'].sum() / 1e6:.1f} MB")
+    with startup_phase("data: filter index"):
+        FILTER_INDEX = FilterIndex(frame)
+    with startup_phase("data: cube"):
+        CUBE = load_cube(frame)
+    YEARS = sorted(int(y) for y in frame["Jahr"].unique())
+    CRIME_SHORT = sorted(frame["Straftat_kurz"].unique())
+    CRIME_HIERARCHY = CrimeHierarchy(CRIME_SHORT)
+    STATES = sorted(frame["Bundesland"].dropna().unique())
+    # published last: ensure_data only checks df
+    df = frame
+
+
+def ensure_data():
+    """init_data() on first use; thread-safe and cheap afterwards."""
+    if df is None:
+        with _DATA_LOCK:
+            if df is None:
+                init_data()
 
 
 # Show the longest crime names that are still used
 
 # --------- LOAD GEO DATA ---------
-print("Lade Geodaten...")
-try:
-    # Load state boundaries
-    gdf_states = gpd.read_file("data/gadm41_DEU_1.shp")
-    gdf_states = gdf_states.explode(index_parts=True).reset_index(drop=True)
-    gdf_states = gdf_states.to_crs("EPSG:4326")
-    gdf_states["Bundesland"] = gdf_states["NAME_1"]
-    
-    # Load city boundaries (level 2) - still needed for city view
-    gdf_cities = gpd.read_file("data/gadm41_DEU_2.shp")
-    gdf_cities = gdf_cities.explode(index_parts=True).reset_index(drop=True)
-    gdf_cities = gdf_cities.to_crs("EPSG:4326")
-    gdf_cities["Bundesland"] = gdf_cities["NAME_1"]
-    gdf_cities["City"] = gdf_cities["NAME_2"]
-    
-    print(f"Geladen: {len(gdf_states)} Bundesländer, {len(gdf_cities)} Städte/Landkreise")
-except Exception as e:
-    print(f"Fehler beim Laden der Geodaten: {e}")
-    gdf_states = None
-    gdf_cities = None
+# Bump when _prepare_gadm_layer changes
+GEO_CACHE_VERSION = 2
+GADM_STATES = "data/gadm41_DEU_1.shp"
+GADM_CITIES = "data/gadm41_DEU_2.shp"
+SHAPEFILE_PARTS = (".shp", ".shx", ".dbf", ".prj", ".cpg")
+
+
+def _shapefile_paths(shp_path):
+    base = os.path.splitext(shp_path)[0]
+    return [base + ext for ext in SHAPEFILE_PARTS if os.path.exists(base + ext)]
+
+
+def _prepare_gadm_layer(shp_path):
+    """
+    Single-part polygons in EPSG:4326 with the Bundesland / City names the app
+    joins on, plus City_norm (norm_admin_names) for the Region crosswalk.
+    """
+    gdf = gpd.read_file(shp_path)
+    gdf = gdf.explode(index_parts=True).reset_index(drop=True)
+    gdf = gdf.to_crs("EPSG:4326")
+    gdf["Bundesland"] = gdf["NAME_1"]
+    if "NAME_2" in gdf.columns:
+        gdf["City"] = gdf["NAME_2"]
+        gdf["City_norm"] = norm_admin_names(gdf["City"])
+    return gdf
+
+
+def load_gadm_layer(shp_path, use_cache=True):
+    """
+    A prepared GADM layer. The result of _prepare_gadm_layer is kept as
+    GeoParquet in CACHE_DIR and reused while the shapefile parts are unchanged.
+    """
+    paths = _shapefile_paths(shp_path)
+    name = os.path.splitext(os.path.basename(shp_path))[0]
+    prep_key = hashlib.sha256(json.dumps(["gadm", GEO_CACHE_VERSION, ADMIN_WORDS]).encode("utf-8")).hexdigest()
+    if use_cache:
+        cached = _read_data_cache(paths, name, prep_key, reader=gpd.read_parquet)
+        if cached is not None:
+            return cached
+
+    gdf = _prepare_gadm_layer(shp_path)
+    if use_cache:
+        _write_data_cache(gdf, paths, name, prep_key)
+    return gdf
+
+
+# --------- GEOMETRY STORE ---------
+# Zoom of the Germany-wide state maps; city views get their zoom from
+# GeometryStore.views
+ZOOM_GERMANY = 4.5
+# Map viewport the view zooms are fitted to (the geo map is 500px high)
+MAP_VIEW_PX = (800, 500)
+MAP_VIEW_ZOOM_RANGE = (ZOOM_GERMANY, 8)
+GERMANY = "Deutschland"
+
+
+def lod_tolerance(zoom):
+    """Simplification tolerance in degrees: half a 256px web-map tile pixel at `zoom`."""
+    return 0.5 * 360.0 / (256 * 2 ** zoom)
+
+
+def fit_zoom(min_lon, min_lat, max_lon, max_lat, padding=0.5):
+    """Web-map zoom (in half steps) at which the bounding box fits MAP_VIEW_PX."""
+    width, height = MAP_VIEW_PX
+    mid_lat = np.radians((min_lat + max_lat) / 2)
+    span_lon = np.maximum(max_lon - min_lon, 1e-6)
+    span_lat = np.maximum(max_lat - min_lat, 1e-6)
+    zoom = np.minimum(
+        np.log2(width * 360 / (256 * span_lon)),
+        np.log2(height * 360 * np.cos(mid_lat) / (256 * span_lat)),
+    ) - padding
+    return np.clip(np.floor(zoom * 2) / 2, *MAP_VIEW_ZOOM_RANGE)
+
+
+def simplify_coverage(geometry, tolerance):
+    """
+    Simplify a layer of polygons without opening gaps between neighbours.
+    Uses GEOS coverage simplification (shared edges are simplified once) and
+    falls back to per-polygon topology-preserving simplification.
+    """
+    try:
+        simplified = shapely.coverage_simplify(np.asarray(geometry.values), tolerance)
+        return gpd.GeoSeries(simplified, index=geometry.index, crs=geometry.crs)
+    except (AttributeError, shapely.errors.GEOSException):
+        # shapely < 2.1 or the layer is not a valid coverage
+        return geometry.simplify(tolerance, preserve_topology=True)
+
+
+class GeometryStore:
+    """
+    GeoJSON for the state and city layers, serialized once at startup.
+
+    Every row of the state / city layer becomes one feature whose id is its row
+    position. Requests only build the attribute frame (index = feature id) and
+    the values; the polygons are sliced out of a prebuilt buffer.
+
+    The features of a layer are kept as one bytes buffer per level (the city
+    features grouped by Bundesland, so a state is one slice) plus numpy
+    offsets, not as Python dicts: a preloaded store is a few large objects that
+    the workers read without touching them per feature. Each request parses its
+    own FeatureCollection from the buffer.
+
+    Each layer is kept at one simplified level of detail per zoom the maps
+    are drawn at: ZOOM_GERMANY and the zooms in `views` (unless lod_zooms
+    is given). The full resolution is built only on request. The feature
+    ids are the same on every level, so attribute frames work with any of
+    them.
+
+    `views` holds center, bounding box and zoom of the city map for Germany
+    (GERMANY) and for every Bundesland.
+    """
+
+    def __init__(self, states, cities, lod_zooms=None):
+        self.state_attrs = pd.DataFrame(states.drop(columns="geometry"))
+        self.city_attrs = pd.DataFrame(cities.drop(columns="geometry"))
+        # dense integer code per GADM city (GID_2): the value joins use it
+        # instead of the GID_2 strings; the parts of a multi-part city share it
+        codes, gids = pd.factorize(self.city_attrs["GID_2"])
+        self.city_attrs["city_code"] = codes.astype(np.int32)
+        self.city_codes = pd.Series(np.arange(len(gids), dtype=np.int32), index=gids)
+        self.views = self._views(cities)
+        if lod_zooms is None:
+            lod_zooms = {ZOOM_GERMANY, *self.views["zoom"]}
+        self.lod_zooms = sorted(float(z) for z in lod_zooms)
+        self._city_rows = self.city_attrs.groupby("Bundesland").indices
+        # buffer order of the city features: grouped by Bundesland, stable
+        self._city_order = np.argsort(
+            pd.factorize(self.city_attrs["Bundesland"])[0], kind="stable"
+        )
+        self.states, self.cities = {}, {}
+
+        # level None = full resolution, built on first use (no view asks for it)
+        self._full = (states.geometry, cities.geometry)
+        self._full_lock = threading.Lock()
+        # finest level first: each coarser level is simplified from the previous
+        # one, which is much smaller than the source layer
+        state_geom, city_geom = self._full
+        for level in reversed(self.lod_zooms):
+            state_geom = simplify_coverage(state_geom, lod_tolerance(level))
+            city_geom = simplify_coverage(city_geom, lod_tolerance(level))
+            self._add_level(level, state_geom, city_geom)
+
+    def _add_level(self, level, state_geom, city_geom):
+        self.cities[level] = self._features(city_geom, self._city_order)
+        # published last: level() checks self.states
+        self.states[level] = self._features(state_geom, np.arange(len(state_geom)))
+
+    @staticmethod
+    def _views(cities):
+        """Mean of the (UTM 32N) city centroids plus the bounding box, per state and overall."""
+        try:
+            centroids = cities.geometry.to_crs("EPSG:32632").centroid.to_crs("EPSG:4326")
+        except Exception as e:
+            print(f"Warning: Could not calculate proper centroids, using simple mean: {e}")
+            centroids = cities.geometry.centroid
+        bounds = cities.geometry.bounds
+        parts = pd.DataFrame({
+            "Bundesland": cities["Bundesland"].to_numpy(),
+            "center_lat": centroids.y.to_numpy(),
+            "center_lon": centroids.x.to_numpy(),
+            "min_lon": bounds["minx"].to_numpy(),
+            "min_lat": bounds["miny"].to_numpy(),
+            "max_lon": bounds["maxx"].to_numpy(),
+            "max_lat": bounds["maxy"].to_numpy(),
+        })
+        how = {
+            "center_lat": "mean", "center_lon": "mean",
+            "min_lon": "min", "min_lat": "min", "max_lon": "max", "max_lat": "max",
+        }
+        views = parts.groupby("Bundesland").agg(how)
+        views.loc[GERMANY] = parts.agg(how)
+        views["zoom"] = fit_zoom(views["min_lon"], views["min_lat"], views["max_lon"], views["max_lat"])
+        return views
+
+    def view(self, state=None):
+        """Center, bounding box and zoom of the city map for a Bundesland (None = Germany)."""
+        key = state if state in self.views.index else GERMANY
+        return self.views.loc[key].to_dict()
+
+    @staticmethod
+    def _features(geometry, order):
+        """
+        The features of a layer, serialized in `order` (row positions) into one
+        buffer, each followed by a comma. Returns the buffer and the start and
+        end offset of every feature, indexed by row position.
+        """
+        geoms = shapely.to_geojson(np.asarray(geometry.values))
+        parts = [
+            f'{{"id":"{i}","type":"Feature","properties":{{}},"geometry":{geoms[i]}}},'.encode()
+            for i in order
+        ]
+        sizes = np.array([len(part) for part in parts], dtype=np.int64)
+        starts, ends = np.empty_like(sizes), np.empty_like(sizes)
+        ends[order] = np.cumsum(sizes)
+        starts[order] = ends[order] - sizes
+        return b"".join(parts), starts, ends
+
+    @staticmethod
+    def _collection(*chunks):
+        """FeatureCollection dict parsed from comma-terminated feature chunks."""
+        body = b"".join(chunks)[:-1]
+        return json.loads(b'{"type":"FeatureCollection","features":[' + body + b"]}")
+
+    def level(self, zoom=None):
+        """Finest precomputed level whose zoom does not exceed `zoom` (None = full)."""
+        if zoom is None:
+            if None not in self.states:
+                # concurrent requests build the full level once
+                with self._full_lock:
+                    if None not in self.states:
+                        self._add_level(None, *self._full)
+            return None
+        levels = [z for z in self.lod_zooms if z <= zoom]
+        return levels[-1] if levels else self.lod_zooms[0]
+
+    def state_geojson(self, zoom=None):
+        buffer, _, _ = self.states[self.level(zoom)]
+        return self._collection(buffer)
+
+    def city_geojson(self, ids=None, state=None, zoom=None):
+        """All city features, those of one Bundesland, or exactly `ids`."""
+        buffer, starts, ends = self.cities[self.level(zoom)]
+        if ids is not None:
+            return self._collection(*(buffer[starts[i]:ends[i]] for i in ids))
+        if state is not None:
+            rows = self._city_rows.get(state)
+            if rows is None:
+                return self._collection()
+            # the rows of a state are contiguous in the buffer
+            return self._collection(buffer[starts[rows[0]]:ends[rows[-1]]])
+        return self._collection(buffer)
+
+
+
+# --------- REGION CROSSWALK ---------
+# Bump when the matching rules in build_region_crosswalk change
+CROSSWALK_VERSION = 1
+# Attribute table of the GADM level-2 layer (GID_2, CC_2, NAME_1, NAME_2)
+GADM_CITY_ATTRS = os.path.splitext(GADM_CITIES)[0] + ".dbf"
+# difflib ratio a leftover Region name needs to be accepted as a fuzzy match
+CROSSWALK_FUZZY_CUTOFF = 0.8
+# Administrative words that appear in the CSV Region names but not in GADM
+ADMIN_WORDS = r"\b(landkreis|kreisfreie\s+stadt|kreis|stadt|region|lk|sk|reg\.|bezirk)\b"
+
+
+def norm_admin_names(names):
+    """
+    Normalize German admin/city names (Series) so CSV Region names match GADM
+    city names: lower case, umlauts/eszett spelled out, administrative words
+    and punctuation removed.
+    """
+    x = names.astype(str).str.lower().str.strip()
+    for umlaut, plain in (("ä", "ae"), ("ö", "oe"), ("ü", "ue"), ("ß", "ss")):
+        x = x.str.replace(umlaut, plain, regex=False)
+    x = x.str.replace(ADMIN_WORDS, " ", regex=True)
+    x = x.str.replace(r"[^a-z0-9\s-]", " ", regex=True)
+    return x.str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+def _fuzzy_city(name, candidates):
+    """Substring match first, then the closest difflib match above the cutoff."""
+    for cand in candidates:
+        if name in cand or cand in name:
+            return cand
+    close = difflib.get_close_matches(name, candidates, n=1, cutoff=CROSSWALK_FUZZY_CUTOFF)
+    return close[0] if close else None
+
+
+def build_region_crosswalk(frame, cities):
+    """
+    Map every (Gemeindeschluessel, Region, Bundesland) of the victim frame to a
+    GADM level-2 feature (GID_2), always within the same Bundesland:
+    1. "schluessel": Gemeindeschluessel equals the Kreisschlüssel CC_2
+    2. "name":       normalized Region equals normalized NAME_2
+    3. "fuzzy":      substring/difflib match among the cities not matched yet
+    Regions without a match keep GID_2 = None.
+    """
+    regions = (
+        frame[["Gemeindeschluessel", "Region", "Bundesland"]]
+        .dropna()
+        .drop_duplicates()
+        .astype({"Gemeindeschluessel": "int64", "Region": str, "Bundesland": str})
+        .reset_index(drop=True)
+    )
+    regions["norm"] = norm_admin_names(regions["Region"])
+
+    # City_norm is computed once when the layer is prepared (_prepare_gadm_layer)
+    gadm = (
+        cities[["GID_2", "CC_2", "Bundesland", "City", "City_norm"]]
+        .drop_duplicates("GID_2")
+        .astype(str)
+        .rename(columns={"City_norm": "norm"})
+    )
+    gadm["Gemeindeschluessel"] = pd.to_numeric(gadm["CC_2"], errors="coerce").astype("Int64")
+
+    # 1) official key
+    keyed = gadm.dropna(subset=["Gemeindeschluessel"]).astype({"Gemeindeschluessel": "int64"})
+    keyed = keyed.drop_duplicates(["Gemeindeschluessel", "Bundesland"])
+    regions = regions.merge(
+        keyed[["Gemeindeschluessel", "Bundesland", "GID_2"]],
+        on=["Gemeindeschluessel", "Bundesland"],
+        how="left",
+    )
+    regions["match"] = regions["GID_2"].notna().map({True: "schluessel", False: None})
+
+    # 2) exact normalized name
+    todo = regions["GID_2"].isna()
+    by_name = gadm.drop_duplicates(["Bundesland", "norm"]).set_index(["Bundesland", "norm"])["GID_2"]
+    names = by_name.reindex(pd.MultiIndex.from_frame(regions.loc[todo, ["Bundesland", "norm"]]))
+    regions.loc[todo, "GID_2"] = names.to_numpy()
+    regions.loc[todo & regions["GID_2"].notna(), "match"] = "name"
+
+    # 3) fuzzy, only for the few leftovers and only against cities still free
+    todo = regions["GID_2"].isna() & (regions["norm"] != "")
+    if todo.any():
+        free = gadm[~gadm["GID_2"].isin(set(regions["GID_2"].dropna()))]
+        pools = {bl: dict(zip(sub["norm"], sub["GID_2"])) for bl, sub in free.groupby("Bundesland")}
+        for i in regions.index[todo]:
+            pool = pools.get(regions.at[i, "Bundesland"], {})
+            hit = _fuzzy_city(regions.at[i, "norm"], list(pool))
+            if hit is not None:
+                regions.at[i, "GID_2"] = pool[hit]
+                regions.at[i, "match"] = "fuzzy"
+
+    return regions.drop(columns="norm")
+
+
+def crosswalk_report(crosswalk):
+    """Print how the regions were matched and which have no geometry."""
+    counts = crosswalk["match"].value_counts()
+    print("Crosswalk Region -> GADM: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+    unmatched = crosswalk[crosswalk["GID_2"].isna()]
+    if not unmatched.empty:
+        names = ", ".join(f"{r.Region} ({r.Bundesland})" for r in unmatched.itertuples())
+        print(f"Hinweis: {len(unmatched)} Regionen ohne Geometrie: {names}")
+
+
+def load_region_crosswalk(frame, cities, use_cache=True):
+    """
+    The Region -> GID_2 crosswalk, kept next to the data cache in CACHE_DIR and
+    rebuilt only when the CSVs, the GADM attributes or the matching rules change.
+    """
+    paths = [*_source_csv_paths(), GADM_CITY_ATTRS]
+    prep_key = hashlib.sha256(
+        json.dumps([CROSSWALK_VERSION, CROSSWALK_FUZZY_CUTOFF, ADMIN_WORDS, _prep_key()]).encode("utf-8")
+    ).hexdigest()
+    crosswalk = _read_data_cache(paths, "crosswalk", prep_key) if use_cache else None
+    if crosswalk is None:
+        crosswalk = build_region_crosswalk(frame, cities)
+        if use_cache:
+            _write_data_cache(crosswalk, paths, "crosswalk", prep_key)
+    crosswalk_report(crosswalk)
+    return crosswalk
+
+
+def region_city_codes(crosswalk, city_codes):
+    """
+    Lookup array Gemeindeschluessel -> city code (GeometryStore.city_codes)
+    for all matched regions; -1 = no geometry.
+    """
+    matched = crosswalk.dropna(subset=["GID_2"]).drop_duplicates("Gemeindeschluessel")
+    keys = matched["Gemeindeschluessel"].to_numpy(dtype=np.int64)
+    lookup = np.full(int(keys.max()) + 1 if len(keys) else 0, -1, dtype=np.int32)
+    lookup[keys] = city_codes.reindex(matched["GID_2"]).fillna(-1).to_numpy(dtype=np.int32)
+    return lookup
+
+
+def sum_by_city(d, cols):
+    """Sum `cols` of the victim rows per GADM city (index = city code); unmatched regions are dropped."""
+    by_key = d.groupby("Gemeindeschluessel", observed=True)[cols].sum()
+    keys = by_key.index.to_numpy(dtype=np.int64)
+    codes = np.full(len(keys), -1, dtype=np.int32)
+    known = keys < len(REGION_TO_CITY)
+    codes[known] = REGION_TO_CITY[keys[known]]
+    matched = codes >= 0
+    return by_key[matched].groupby(codes[matched]).sum()
+
+
+# --------- GEO LOADING ---------
+# The geo layers are loaded in a background thread once the server takes
+# requests (start_geo_loading), so pages without maps never wait for them.
+# GEO_STORE stays None until everything is ready; the geo figures show a
+# placeholder until then.
+GEO_STORE = None
+REGION_CROSSWALK = REGION_TO_CITY = None
+GEO_STATUS = "pending"  # pending -> loading -> ready | failed
+GEO_READY = threading.Event()
+_GEO_LOCK = threading.Lock()
+GEO_LOADING_MSG = "Geodaten werden geladen …"
+
+
+def load_geo_data():
+    """Load the GADM layers, build GEO_STORE and the Region crosswalk."""
+    global GEO_STORE, REGION_CROSSWALK, REGION_TO_CITY, GEO_STATUS
+    ensure_data()
+    print("Lade Geodaten...")
+    try:
+        with startup_phase("geo: layers"):
+            # Load state boundaries
+            states = load_gadm_layer(GADM_STATES)
+
+            # Load city boundaries (level 2) - still needed for city view
+            cities = load_gadm_layer(GADM_CITIES)
+
+        print(f"Geladen: {len(states)} Bundesländer, {len(cities)} Städte/Landkreise")
+        with startup_phase("geo: store"):
+            store = GeometryStore(states, cities)
+        with startup_phase("geo: crosswalk"):
+            crosswalk = load_region_crosswalk(df, store.city_attrs)
+    except Exception as e:
+        print(f"Fehler beim Laden der Geodaten: {e}")
+        GEO_STATUS = "failed"
+    else:
+        REGION_CROSSWALK, REGION_TO_CITY = crosswalk, region_city_codes(crosswalk, store.city_codes)
+        # published last: the figures only check GEO_STORE
+        GEO_STORE = store
+        GEO_STATUS = "ready"
+    finally:
+        GEO_READY.set()
+
+
+def start_geo_loading():
+    """Start load_geo_data in a daemon thread; later calls do nothing."""
+    global GEO_STATUS
+    if GEO_STATUS != "pending":
+        return
+    with _GEO_LOCK:
+        if GEO_STATUS != "pending":
+            return
+        GEO_STATUS = "loading"
+    threading.Thread(target=load_geo_data, name="geo-loader", daemon=True).start()
+
+
+def preload():
+    """
+    Load everything the callbacks read before a pre-fork server (gunicorn with
+    preload_app, see gunicorn.conf.py) starts its workers: data, cube, geo
+    layers and crosswalk, synchronously and without the loader thread.
+
+    gc.freeze() then moves all these objects into the permanent generation, so
+    the workers' garbage collections never write to them. Pages still turn
+    private where a worker touches a shared object (reference counts), so the
+    bulk is held in few large objects: numpy columns and cube arrays, and the
+    GeometryStore's byte buffers, from which each figure parses its own
+    GeoJSON. The parsed figures live in the per-worker figure caches.
+    """
+    global GEO_STATUS
+    ensure_data()
+    with _GEO_LOCK:
+        pending = GEO_STATUS == "pending"
+        if pending:
+            GEO_STATUS = "loading"
+    if pending:
+        load_geo_data()
+    GEO_READY.wait()
+    if CLIENTSIDE_CUBE:
+        client_cube()
+    gc.collect()
+    gc.freeze()
+
+
+def geo_unavailable_fig(msg="Keine Geodaten verfügbar"):
+    """Placeholder while the geo layers load, `msg` if loading failed."""
+    if GEO_STATUS in ("pending", "loading"):
+        return empty_fig(GEO_LOADING_MSG)
+    return empty_fig(msg)
+
+
+# --------- CACHES ---------
+FILTER_CACHE_SIZE = 64
+# Serialized figures are bounded by size: one choropleth can be several MB
+FIGURE_CACHE_MAX_BYTES = int(os.environ.get("CRIME_DASH_FIGURE_CACHE_MB", "128")) * 1024 * 1024
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with hit/miss/eviction counters.
+
+    Bounded by entry count (max_entries) and/or by total size (max_bytes, with
+    sizeof(value) giving the size of one entry).
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, sizeof=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof or (lambda value: 0)
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _over_limit(self):
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self.bytes > self.max_bytes
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        size = self._sizeof(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return  # would evict everything else and still not fit
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._sizes.pop(key)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._sizes[key] = size
+            self.bytes += size
+            while self._over_limit():
+                old_key, _ = self._entries.popitem(last=False)
+                self.bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.bytes = 0
+
+    def info(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
+
+
+def selection_key(years, crimes, states):
+    """Order-insensitive canonical form of a sidebar selection."""
+    return tuple(tuple(sorted(set(values or ()))) for values in (years, crimes, states))
+
+
+_FILTER_CACHE = LRUCache(FILTER_CACHE_SIZE)
+
+
+def parse_selection(selection):
+    """selection_key from the JSON in the selection store."""
+    if selection is None:
+        # the store is filled by update_selection right after the sidebar renders
+        raise PreventUpdate
+    return tuple(tuple(values) for values in json.loads(selection))
+
+
+def overview_key(key):
+    """The overview ignores the crime filter."""
+    years, _, states = key
+    return years, (), states
+
+
+def filter_cache_info():
+    return _FILTER_CACHE.info()
+
+
+# Entries are (JSON size, figure dict); the size bounds the cache
+_FIGURE_CACHE = LRUCache(max_bytes=FIGURE_CACHE_MAX_BYTES, sizeof=lambda entry: entry[0])
+
+
+def figure_cache_info():
+    return _FIGURE_CACHE.info()
+
+
+# Builders that need GEO_STORE (see GEO LOADING)
+GEO_BUILDERS = {"fig_geo_map", "fig_children_ranking"}
+
+
+def cached_figure(builder, selection, data, **options):
+    """
+    builder(data, **options) as a figure dict, memoized under (builder,
+    selection, options). `selection` must be the selection_key the data was
+    produced from; the options must be hashable.
+
+    The figure is serialized and parsed once, on the miss; hits return the
+    cached dict itself, so callers must not modify it.
+    """
+    if builder.__name__ in GEO_BUILDERS and GEO_STORE is None:
+        # loading placeholder, must not end up in the cache
+        return builder(data, **options)
+    key = (builder.__name__, selection, tuple(sorted(options.items())))
+    entry = _FIGURE_CACHE.get(key)
+    if entry is None:
+        payload = builder(data, **options).to_json()
+        entry = (len(payload), json.loads(payload))
+        _FIGURE_CACHE.put(key, entry)
+    return entry[1]
+
 
 # --------- HELPERS ---------
-def filter_data(years, crimes, states):
-    d = df
-    if years:
-        d = d[d["Jahr"].isin(years)]
-    if crimes:
-        d = d[d["Straftat_kurz"].isin(crimes)]
-    if states:
-        d = d[d["Bundesland"].isin(states)]
-    return d
+def filter_data(years, crimes, states, level=None):
+    """
+    Rows of df matching the selection. Results are kept in an LRU cache keyed by
+    selection_key; callers get a shallow copy, so (copy-on-write) the cached
+    frame itself is read-only for them.
+
+    With a `level` only the crime categories CRIME_HIERARCHY picks for that
+    level are returned, i.e. no category that is contained in another one.
+    """
+    key = selection_key(years, crimes, states)
+    cache_key = key if level is None else (key, level)
+    d = _FILTER_CACHE.get(cache_key)
+    if d is None:
+        crimes = key[1] if level is None else CRIME_HIERARCHY.level_nodes(level, key[1])
+        d = FILTER_INDEX.select(Jahr=key[0], Straftat_kurz=crimes, Bundesland=key[2])
+        _FILTER_CACHE.put(cache_key, d)
+    return d.copy(deep=False)
+
+
+def cube_view(years, crimes, states):
+    """Same selection as filter_data, answered from the pre-aggregated cube."""
+    return CUBE.view(years, crimes, states)
 
 
 def empty_fig(msg="Keine Daten verfügbar"):
@@ -224,28 +1775,47 @@ def format_int(x):
 
 
 # --------- KPI CALC ---------
-def build_kpis(d):
+# KPI text for values that need a total the source does not have
+NO_TOTAL = "k. A."
+
+
+def build_kpis(c):
     """
-    KPIs:
+    KPIs (from a CubeView):
     - Gesamtzahl der Opfer
     - Opfer pro Jahr (Ø)
     - männlich vs. weiblich (%)
     - Unter 18 vs. Erwachsene (%)
     - Anzahl Deliktsgruppen
+
+    The first four come from the total level, i.e. only from years with a
+    "Straftaten insgesamt" row in the source (not 2022); they are NO_TOTAL if
+    the selection has no such year.
     """
-    if d.empty:
+    if c.empty:
         return ("0", "0", "0 % / 0 %", "0 % / 0 %", "0")
 
+    # 5) Anzahl Deliktsgruppen (ohne 'Straftaten insgesamt')
+    crime_types = sum(1 for crime in c.observed("Straftat_kurz") if crime != TOTAL_CRIME)
+
+    col_children = "Opfer Kinder bis 14 Jahre- insgesamt"
+    col_youth_14_18 = "Opfer Jugendliche 14 bis unter 18 Jahre - insgesamt"
+    wanted = ["Oper insgesamt", "Opfer maennlich", "Opfer weiblich", col_children, col_youth_14_18]
+    total = c.at_level(LEVEL_TOTAL)
+    sums = total.totals([m for m in wanted if m in c.cube.metrics])
+
     # 1) Gesamtzahl der Opfer
-    total_victims = d["Oper insgesamt"].sum()
+    total_victims = sums["Oper insgesamt"]
 
     # 2) Ø Opfer pro Jahr
-    n_years = d["Jahr"].nunique()
-    victims_per_year = int(round(total_victims / n_years)) if n_years > 0 else 0
+    n_years = len(total.observed("Jahr"))
+    if n_years == 0:
+        return (NO_TOTAL, NO_TOTAL, NO_TOTAL, NO_TOTAL, str(crime_types))
+    victims_per_year = int(round(total_victims / n_years))
 
     # 3) männlich vs. weiblich (%)
-    male = d["Opfer maennlich"].sum() if "Opfer maennlich" in d.columns else 0
-    female = d["Opfer weiblich"].sum() if "Opfer weiblich" in d.columns else 0
+    male = sums.get("Opfer maennlich", 0)
+    female = sums.get("Opfer weiblich", 0)
     sex_total = male + female
 
     def pct(part, whole):
@@ -256,27 +1826,11 @@ def build_kpis(d):
     male_female_str = f"{pct(male, sex_total)} / {pct(female, sex_total)}"
 
     # 4) Unter 18 vs Erwachsene (%)
-    col_children = "Opfer Kinder bis 14 Jahre- insgesamt"
-    col_youth_14_18 = "Opfer Jugendliche 14 bis unter 18 Jahre - insgesamt"
+    under18 = sums.get(col_children, 0) + sums.get(col_youth_14_18, 0)
 
-    under18 = 0
-    if col_children in d.columns:
-        under18 += d[col_children].sum()
-    if col_youth_14_18 in d.columns:
-        under18 += d[col_youth_14_18].sum()
-
-    adults = max(total_victims - under18, 0)
+    adults = max(int(total_victims) - int(under18), 0)
     under18_adults_str = f"{pct(under18, total_victims)} / {pct(adults, total_victims)}"
 
-    # 5) Anzahl Deliktsgruppen (ohne 'Straftaten insgesamt')
-    if "Straftat_kurz" in d.columns:
-        crime_types = (
-            d.loc[d["Straftat_kurz"] != "Straftaten insgesamt", "Straftat_kurz"]
-            .nunique()
-        )
-    else:
-        crime_types = 0
-
     return (
         format_int(total_victims),
         format_int(victims_per_year),
@@ -287,12 +1841,37 @@ def build_kpis(d):
 
 
 # --------- OVERVIEW FIGURES ---------
-def fig_trend(d):
-    if d.empty:
+def years_without_total(c):
+    """Years of the selection that have rows but none at the total level (2022: no "Straftaten insgesamt")."""
+    return sorted(set(c.observed("Jahr")) - set(c.at_level(LEVEL_TOTAL).observed("Jahr")))
+
+
+def missing_totals_text(years):
+    return "Keine Gesamtzahl in den Quelldaten: " + ", ".join(str(y) for y in years)
+
+
+def note_missing_totals(fig, years):
+    """Gaps in a trend are marked, not interpolated: name the years above the plot."""
+    if years:
+        fig.add_annotation(
+            text=missing_totals_text(years),
+            xref="paper", yref="paper", x=1, y=1,
+            xanchor="right", yanchor="bottom", showarrow=False,
+        )
+    return fig
+
+
+def fig_trend(c):
+    if c.empty:
         return empty_fig()
 
-    d2 = d[d["Straftat_kurz"] != "Straftaten insgesamt"]
-    g = d2.groupby("Jahr")["Oper insgesamt"].sum().reset_index()
+    total = c.at_level(LEVEL_TOTAL)
+    if total.empty:
+        return empty_fig(missing_totals_text(years_without_total(c)))
+
+    # years without a total stay on the axis as a gap
+    years = pd.Index(sorted(c.observed("Jahr")), name="Jahr")
+    g = total.sum_by("Jahr").set_index("Jahr").reindex(years).reset_index()
 
     fig = px.line(
         g,
@@ -303,20 +1882,14 @@ def fig_trend(d):
         title="Zeitliche Entwicklung der Opferzahlen",
         labels={"Oper insgesamt": "Opferzahl"},
     )
-    return fig
+    return note_missing_totals(fig, years_without_total(c))
 
 
-def fig_top5(d):
-    d2 = d[d["Straftat_kurz"] != "Straftaten insgesamt"]
-    if d2.empty:
+def fig_top5(c):
+    g = c.at_level(LEVEL_OFFENCE).sum_by("Straftat_kurz")
+    if g.empty:
         return empty_fig()
-    g = (
-        d2.groupby("Straftat_kurz")["Oper insgesamt"]
-        .sum()
-        .nlargest(5)
-        .reset_index()
-        .sort_values("Oper insgesamt")
-    )
+    g = g.nlargest(5, "Oper insgesamt").sort_values("Oper insgesamt")
     fig = px.bar(
         g,
         x="Oper insgesamt",
@@ -331,17 +1904,17 @@ def fig_top5(d):
     return fig
 
 
-def fig_donut(d):
+def fig_donut(c):
     """
     Statt Donut: Treemap zur Darstellung der Deliktsstruktur.
     Besser lesbar bei vielen Kategorien.
     """
-    d2 = d[d["Straftat_kurz"] != "Straftaten insgesamt"]
-    if d2.empty:
+    g = c.at_level(LEVEL_OFFENCE).sum_by("Straftat_kurz")
+    # areas cannot show the negative "Sonstige" remainders
+    g = g[g["Oper insgesamt"] > 0]
+    if g.empty:
         return empty_fig()
 
-    g = d2.groupby("Straftat_kurz")["Oper insgesamt"].sum().reset_index()
-
     fig = px.treemap(
         g,
         path=["Straftat_kurz"],
@@ -366,7 +1939,7 @@ PKS_PIE_COLORS = [
     "#64748b", # slate
 ]
 
-def fig_crime_pie(d):
+def fig_crime_pie(c):
     """
     Two-level pie chart like the reference figure:
     - Main chart (left): Top 10 crime categories + one slice "Andere".
@@ -374,19 +1947,15 @@ def fig_crime_pie(d):
 
     If there are <= 10 categories, we show a single pie.
     """
-    if d.empty:
+    if c.empty:
         return empty_fig()
 
-    d2 = d[d["Straftat_kurz"] != "Straftaten insgesamt"]
-    if d2.empty:
+    g = c.at_level(LEVEL_OFFENCE).sum_by("Straftat_kurz")
+    # slices cannot show the negative "Sonstige" remainders
+    g = g[g["Oper insgesamt"] > 0]
+    if g.empty:
         return empty_fig()
-
-    g = (
-        d2.groupby("Straftat_kurz")["Oper insgesamt"]
-        .sum()
-        .reset_index()
-        .sort_values("Oper insgesamt", ascending=False)
-    )
+    g = g.sort_values("Oper insgesamt", ascending=False)
 
     # Keep top 10 for the main chart
     top_n = 10
@@ -549,199 +2118,88 @@ def fig_crime_pie(d):
 
 
 # --------- GEOGRAPHIC FIGURES ---------
-def prepare_state_geo_data(d, value_col="Oper insgesamt", age_group_col=None):
-    """Prepare state-level geographic data for the given metric column."""
-    if d.empty or gdf_states is None:
+def prepare_state_geo_data(d, value_col="Oper insgesamt", age_group_col=None, zoom=None):
+    """
+    Prepare state-level geographic data for the given metric column.
+    `d` holds the rows at LEVEL_TOTAL (filter_data(..., level=LEVEL_TOTAL)).
+    Returns the attribute frame (index = feature id) and the shared GeoJSON
+    at the level of detail for `zoom`.
+    """
+    if d.empty or GEO_STORE is None:
         return None, None
 
-    victims_df = d[d["Straftat_kurz"] != "Straftaten insgesamt"]
-
-    if value_col not in victims_df.columns:
+    if value_col not in d.columns:
         value_col = "Oper insgesamt"
 
-    # Calculate total victims for each state
-    victims = (
-        victims_df.groupby("Bundesland")[value_col]
-        .sum()
-        .reset_index()
-        .rename(columns={value_col: "Opfer_insgesamt"})
-    )
-    
-    # Calculate age group victims if specified
-    age_group_victims = None
-    if age_group_col and age_group_col in victims_df.columns:
-        age_group_victims = (
-            victims_df.groupby("Bundesland")[age_group_col]
-            .sum()
-            .reset_index()
-            .rename(columns={age_group_col: "Opfer_altersgruppe"})
-        )
-    
-    # Merge with geo data
-    gdf_merged = gdf_states.merge(victims, on="Bundesland", how="left")
-    
-    # Add age group data if available
-    if age_group_victims is not None:
-        gdf_merged = gdf_merged.merge(age_group_victims, on="Bundesland", how="left")
-    else:
-        gdf_merged["Opfer_altersgruppe"] = 0
-    
-    # Fill NaN values
-    gdf_merged["Opfer_insgesamt"] = gdf_merged["Opfer_insgesamt"].fillna(0)
-    gdf_merged["Opfer_altersgruppe"] = gdf_merged["Opfer_altersgruppe"].fillna(0)
-
-    geojson_data = json.loads(gdf_merged.to_json())
-    return gdf_merged, geojson_data
-
-def _norm_admin_name(x: str) -> str:
-    """Normalize German admin/city strings so Region names match shapefile city names better."""
-    x = str(x).lower().strip()
-
-    # Replace umlauts/eszett (common mismatch cause)
-    x = (
-        x.replace("ä", "ae")
-        .replace("ö", "oe")
-        .replace("ü", "ue")
-        .replace("ß", "ss")
-    )
+    cols = [value_col]
+    if age_group_col and age_group_col in d.columns:
+        cols.append(age_group_col)
+    by_state = d.groupby("Bundesland", observed=True)[cols].sum()
 
-    # Remove common administrative words that appear in CSV but not in shapes
-    x = re.sub(
-        r"\b(landkreis|kreisfreie\s+stadt|kreis|stadt|region|lk|sk|reg\.|bezirk)\b",
-        " ",
-        x,
-    )
+    # Join the per-state sums onto the state polygons
+    states = GEO_STORE.state_attrs.copy()
+    states["Opfer_insgesamt"] = states["Bundesland"].map(by_state[value_col]).fillna(0)
+    if len(cols) > 1:
+        states["Opfer_altersgruppe"] = states["Bundesland"].map(by_state[age_group_col]).fillna(0)
+    else:
+        states["Opfer_altersgruppe"] = 0
 
-    # Remove punctuation and collapse whitespace
-    x = re.sub(r"[^a-z0-9\s-]", " ", x)
-    x = re.sub(r"\s+", " ", x).strip()
-    return x
+    return states, GEO_STORE.state_geojson(zoom=zoom)
 
 
-def prepare_city_geo_data(d, selected_state=None, value_col="Oper insgesamt", age_group_col=None):
+def prepare_city_geo_data(
+    d, selected_state=None, value_col="Oper insgesamt", age_group_col=None, zoom=None, geojson=True
+):
     """
     Prepare city-level geographic data.
     - selected_state = None  -> all cities in Germany
     - selected_state = Name  -> only cities of this state
+    `d` holds the rows at LEVEL_TOTAL, as for prepare_state_geo_data.
+    With geojson=False no GeoJSON is returned (the caller picks the features).
 
     FIX:
-    - match Region->City first
+    - map Region->City first (REGION_TO_CITY, built once at startup)
     - keep only matched cities
     - THEN apply Top-N later in fig_geo_map
 
     This prevents Top10 showing 9, Top20 showing 19, etc.
     """
-    if d.empty or gdf_cities is None:
-        return None, None, None
+    if d.empty or GEO_STORE is None:
+        return None, None
 
     if selected_state:
-        state_data = d[d["Bundesland"] == selected_state].copy()
-        gdf_subset = gdf_cities[gdf_cities["Bundesland"] == selected_state].copy()
+        state_data = d[d["Bundesland"] == selected_state]
+        gdf_subset = GEO_STORE.city_attrs[GEO_STORE.city_attrs["Bundesland"] == selected_state]
     else:
-        state_data = d.copy()
-        gdf_subset = gdf_cities.copy()
+        state_data = d
+        gdf_subset = GEO_STORE.city_attrs
 
     if state_data.empty or gdf_subset.empty:
-        return None, None, None
+        return None, None
 
     if value_col not in state_data.columns:
         value_col = "Oper insgesamt"
 
-    # --- Aggregate by Region + Bundesland (prevents ambiguity like "Neustadt" in multiple states) ---
-    city_victims = (
-        state_data.groupby(["Region", "Bundesland"])[value_col]
-        .sum()
-        .reset_index()
-        .rename(columns={value_col: "Opfer_insgesamt"})
-    )
-
-    # --- Age group victims (same grouping) ---
+    # --- Sum per Kreis key, then per GADM feature through the crosswalk ---
+    cols = [value_col]
     if age_group_col and age_group_col in state_data.columns:
-        age_group_city_victims = (
-            state_data.groupby(["Region", "Bundesland"])[age_group_col]
-            .sum()
-            .reset_index()
-            .rename(columns={age_group_col: "Opfer_altersgruppe"})
-        )
-        city_victims = city_victims.merge(
-            age_group_city_victims, on=["Region", "Bundesland"], how="left"
-        )
-    else:
-        city_victims["Opfer_altersgruppe"] = 0
-
-    city_victims["Opfer_altersgruppe"] = city_victims["Opfer_altersgruppe"].fillna(0)
-
-    # --- Build per-state normalized lookup for shapefile city names ---
-    gdf_subset = gdf_subset.copy()
-    gdf_subset["City_norm"] = gdf_subset["City"].apply(_norm_admin_name)
-
-    # Dict: {Bundesland -> {City_norm -> City}}
-    lookup_by_state = {}
-    for bl, sub in gdf_subset.groupby("Bundesland"):
-        lookup_by_state[bl] = dict(zip(sub["City_norm"], sub["City"]))
-
-    def match_city(region_name: str, bundesland_name: str):
-        r = _norm_admin_name(region_name)
-        if not r:
-            return None
-
-        city_norm_to_city = lookup_by_state.get(bundesland_name, {})
-        if not city_norm_to_city:
-            return None
-
-        # 1) exact normalized match
-        if r in city_norm_to_city:
-            return city_norm_to_city[r]
-
-        # 2) substring fallback inside the same Bundesland
-        for cn, real_city in city_norm_to_city.items():
-            if r in cn or cn in r:
-                return real_city
-
-        return None
-
-    # Match Region -> City within the same Bundesland (much higher accuracy)
-    city_victims["City_match"] = city_victims.apply(
-        lambda row: match_city(row["Region"], row["Bundesland"]), axis=1
-    )
-
-    # Debug: show unmatched Regions (enable if needed)
-    # unmatched = city_victims[city_victims["City_match"].isna()][["Region"]].drop_duplicates()
-    # print("Unmatched Regions (sample):", unmatched.head(30).to_string(index=False))
-
-    # Keep only matched entries (these are drawable on the map)
-    matched = city_victims.dropna(subset=["City_match"]).copy()
-    if matched.empty:
-        return None, None, None
-
-    matched_city = (
-        matched.groupby(["Bundesland", "City_match"])[["Opfer_insgesamt", "Opfer_altersgruppe"]]
-        .sum()
-        .reset_index()
-        .rename(columns={"City_match": "City"})
-    )
+        cols.append(age_group_col)
+    by_city = sum_by_city(state_data, cols)
+    if by_city.empty:
+        return None, None
+    by_city.columns = ["Opfer_insgesamt", "Opfer_altersgruppe"][: len(cols)]
 
-    # Merge into GeoDataFrame using BOTH keys (Bundesland + City)
-    gdf_merged = gdf_subset.merge(matched_city, on=["Bundesland", "City"], how="left")
+    # join() keeps the feature ids as index; every part of a multi-part city
+    # gets the city's value
+    gdf_merged = gdf_subset.join(by_city, on="city_code")
     gdf_merged["Opfer_insgesamt"] = gdf_merged["Opfer_insgesamt"].fillna(0)
-    gdf_merged["Opfer_altersgruppe"] = gdf_merged["Opfer_altersgruppe"].fillna(0)
-
-    # Calculate map center
-    try:
-        gdf_projected = gdf_merged.to_crs("EPSG:32632")
-        centroid = gdf_projected.geometry.centroid
-        centroid_wgs84 = centroid.to_crs("EPSG:4326")
-        center_lat = centroid_wgs84.y.mean()
-        center_lon = centroid_wgs84.x.mean()
-    except Exception as e:
-        print(
-            f"Warning: Could not calculate proper centroid for {selected_state or 'Deutschland'}, using simple mean: {e}"
-        )
-        center_lat = gdf_merged.geometry.centroid.y.mean()
-        center_lon = gdf_merged.geometry.centroid.x.mean()
+    if len(cols) > 1:
+        gdf_merged["Opfer_altersgruppe"] = gdf_merged["Opfer_altersgruppe"].fillna(0)
+    else:
+        gdf_merged["Opfer_altersgruppe"] = 0
 
-    geojson_data = json.loads(gdf_merged.to_json())
-    return gdf_merged, geojson_data, (center_lat, center_lon)
+    geojson_data = GEO_STORE.city_geojson(state=selected_state, zoom=zoom) if geojson else None
+    return gdf_merged, geojson_data
 
 # ----- COLOR SCALES FOR SAFETY MODE -----
 COLOR_SCALE_UNSAFE = "Reds"
@@ -761,9 +2219,12 @@ def fig_geo_map(d, selected_state=None, city_mode="bundesland", age_group="all",
         - "safe"   → green scale (low = good)
         - "unsafe" → red scale (high = dangerous)
         - "all"    → neutral scale
+    `d` holds the rows at LEVEL_TOTAL (filter_data(..., level=LEVEL_TOTAL)).
     """
 
-    if d.empty or gdf_states is None:
+    if GEO_STORE is None:
+        return geo_unavailable_fig()
+    if d.empty:
         return empty_fig("Keine Geodaten verfügbar")
 
     # ----- Select metric column (age-aware) -----
@@ -795,12 +2256,14 @@ def fig_geo_map(d, selected_state=None, city_mode="bundesland", age_group="all",
     # ✅ BUNDESLÄNDER VIEW ----------------------------------------------------
     # ----------------------------------------------------
     if city_mode == "bundesland" and selected_state is None:
-        gdf_states_data, geojson_data = prepare_state_geo_data(d, value_col, age_group_col)
+        gdf_states_data, geojson_data = prepare_state_geo_data(d, value_col, age_group_col, zoom=ZOOM_GERMANY)
         if gdf_states_data is None:
             return empty_fig("Keine Bundeslanddaten verfügbar")
 
         # Sort by safe/unsafe using metric_col
         gdf_states_data = gdf_states_data.sort_values(metric_col, ascending=ascending)
+        # separate column, so custom_data never names the same column twice
+        gdf_states_data["Metrik"] = gdf_states_data[metric_col]
 
         fig = px.choropleth_map(
             gdf_states_data,
@@ -814,11 +2277,11 @@ def fig_geo_map(d, selected_state=None, city_mode="bundesland", age_group="all",
                 "Opfer_altersgruppe": True,
                 "Bundesland": False
             },
-            custom_data=["Bundesland", metric_col, "Opfer_insgesamt", "Opfer_altersgruppe"],
+            custom_data=["Bundesland", "Metrik", "Opfer_insgesamt", "Opfer_altersgruppe"],
             opacity=0.7,
             map_style="carto-positron",
             color_continuous_scale=color_scale,
-            zoom=4.5,
+            zoom=ZOOM_GERMANY,
             center={"lat": 51.0, "lon": 10.2},
             title=f"Opfer nach Bundesland – {age_label_for_title}",
         )
@@ -854,20 +2317,27 @@ def fig_geo_map(d, selected_state=None, city_mode="bundesland", age_group="all",
     # ----------------------------------------------------
     # ✅ CITY VIEW (all Germany OR inside Bundesland)
     # ----------------------------------------------------
-    gdf_cities_data, geojson_data, center = prepare_city_geo_data(d, selected_state, value_col, age_group_col)
+    view = GEO_STORE.view(selected_state)
+    zoom = view["zoom"]
+    top_n = city_mode != "all" and isinstance(city_mode, int)
+    gdf_cities_data, geojson_data = prepare_city_geo_data(
+        d, selected_state, value_col, age_group_col, zoom=zoom, geojson=not top_n
+    )
     if gdf_cities_data is None:
         return empty_fig("Keine Städtedaten verfügbar")
 
-    center_lat, center_lon = center
-
     gdf_plot = gdf_cities_data.copy()
 
     # For Top-N views, rank ONLY cities with data (avoid irrelevant 0-value polygons)
-    if city_mode != "all" and isinstance(city_mode, int):
+    if top_n:
         gdf_rank = gdf_plot[gdf_plot[metric_col] > 0].copy()
         if gdf_rank.empty:
             return empty_fig("Keine Städtedaten verfügbar (nach Filter).")
         gdf_plot = gdf_rank.sort_values(metric_col, ascending=ascending).head(city_mode)
+        # only ship the polygons that are actually drawn
+        geojson_data = GEO_STORE.city_geojson(ids=gdf_plot.index, zoom=zoom)
+
+    gdf_plot["Metrik"] = gdf_plot[metric_col]
 
     fig = px.choropleth_map(
         gdf_plot,
@@ -882,12 +2352,12 @@ def fig_geo_map(d, selected_state=None, city_mode="bundesland", age_group="all",
             "Bundesland": True,
             "City": False
         },
-        custom_data=["City", "Bundesland", metric_col, "Opfer_insgesamt", "Opfer_altersgruppe"],
+        custom_data=["City", "Bundesland", "Metrik", "Opfer_insgesamt", "Opfer_altersgruppe"],
         opacity=0.8,
         map_style="carto-positron",
         color_continuous_scale=color_scale,
-        zoom=6 if selected_state else 5,
-        center={"lat": center_lat, "lon": center_lon},
+        zoom=zoom,
+        center={"lat": view["center_lat"], "lon": view["center_lon"]},
         title=f"Opfer – Städteansicht – {age_label_for_title}",
     )
 
@@ -921,18 +2391,13 @@ def fig_geo_map(d, selected_state=None, city_mode="bundesland", age_group="all",
 
     return fig
 
-def fig_geo_state_bar(d):
-    if d.empty:
+def fig_geo_state_bar(c):
+    if c.empty:
         return empty_fig()
 
-    # Remove total-crime category
-    d2 = d[d["Straftat_kurz"] != "Straftaten insgesamt"]
-
-    # Aggregate only real crime categories
+    # Aggregate the total level (no overlapping crime categories)
     g = (
-        d2.groupby("Bundesland")["Oper insgesamt"]
-        .sum()
-        .reset_index()
+        c.at_level(LEVEL_TOTAL).sum_by("Bundesland")
         .sort_values("Oper insgesamt", ascending=True)
     )
 
@@ -977,7 +2442,7 @@ def fig_geo_state_bar(d):
     # Layout styling
     fig.update_layout(
         title="Opfer nach Bundesland",
-        xaxis_title="Opferzahl (ohne 'Straftaten insgesamt')",
+        xaxis_title="Opferzahl",
         yaxis_title="Bundesland",
         height=500,
         margin=dict(l=80, r=20, t=60, b=40),
@@ -992,15 +2457,13 @@ def fig_geo_state_bar(d):
 
 
 
-def fig_geo_top(d):
-    if d.empty:
+def fig_geo_top(c):
+    if c.empty:
         return empty_fig()
 
     # Aggregate by city/region only
     g = (
-        d.groupby("Region")["Oper insgesamt"]
-        .sum()
-        .reset_index()
+        c.at_level(LEVEL_TOTAL).sum_by("Region")
         .nlargest(10, "Oper insgesamt")
         .sort_values("Oper insgesamt")
     )
@@ -1028,13 +2491,11 @@ def fig_geo_top(d):
 
 
 # --------- CRIME TYPE FIGURES ---------
-def fig_heatmap(d):
-    d2 = d[d["Straftat_kurz"] != "Straftaten insgesamt"]
-    if d2.empty:
+def fig_heatmap(c):
+    g = c.at_level(LEVEL_OFFENCE).sum_by(["Straftat_kurz", "Jahr"])
+    if g.empty:
         return empty_fig()
 
-    g = d2.groupby(["Straftat_kurz", "Jahr"])["Oper insgesamt"].sum().reset_index()
-
     fig = px.density_heatmap(
         g,
         x="Jahr",
@@ -1055,13 +2516,14 @@ def fig_heatmap(d):
     return fig
 
 
-def fig_stacked(d):
-    d2 = d[d["Straftat_kurz"] != "Straftaten insgesamt"]
-    if d2.empty:
+def fig_stacked(c):
+    offences = c.at_level(LEVEL_OFFENCE)
+    by_crime = offences.sum_by("Straftat_kurz")
+    if by_crime.empty:
         return empty_fig()
-    top = d2.groupby("Straftat_kurz")["Oper insgesamt"].sum().nlargest(6).index
-    d_top = d2[d2["Straftat_kurz"].isin(top)]
-    g = d_top.groupby(["Jahr", "Straftat_kurz"])["Oper insgesamt"].sum().reset_index()
+    top = by_crime.nlargest(6, "Oper insgesamt")["Straftat_kurz"]
+    g = offences.sum_by(["Jahr", "Straftat_kurz"])
+    g = g[g["Straftat_kurz"].isin(top)].reset_index(drop=True)
     fig = px.bar(
         g,
         x="Jahr",
@@ -1096,12 +2558,19 @@ def fig_age(d, crime):
 
 
 # --------- TEMPORAL FIGURES ---------
-def fig_state_trend(d):
-    if d.empty:
+def fig_state_trend(c):
+    if c.empty:
         return empty_fig()
-    top = d.groupby("Bundesland")["Oper insgesamt"].sum().nlargest(6).index
-    d_top = d[d["Bundesland"].isin(top)]
-    g = d_top.groupby(["Jahr", "Bundesland"])["Oper insgesamt"].sum().reset_index()
+    total = c.at_level(LEVEL_TOTAL)
+    if total.empty:
+        return empty_fig(missing_totals_text(years_without_total(c)))
+    top = total.sum_by("Bundesland").nlargest(6, "Oper insgesamt")["Bundesland"]
+    g = total.sum_by(["Jahr", "Bundesland"])
+    # every line runs over all years of the selection, with gaps where a total is missing
+    cells = pd.MultiIndex.from_product(
+        [sorted(c.observed("Jahr")), sorted(top)], names=["Jahr", "Bundesland"]
+    )
+    g = g.set_index(["Jahr", "Bundesland"]).reindex(cells).reset_index()
     fig = px.line(
         g,
         x="Jahr",
@@ -1112,17 +2581,18 @@ def fig_state_trend(d):
         title="Ländervergleich im Zeitverlauf",
         labels={"Oper insgesamt": "Opferzahl"},
     )
-    return fig
+    return note_missing_totals(fig, years_without_total(c))
 
 
-def fig_diverg(d):
-    if d.empty:
+def fig_diverg(c):
+    if c.empty:
         return empty_fig()
-    years = sorted(d["Jahr"].unique())
+    total = c.at_level(LEVEL_TOTAL)
+    years = sorted(total.observed("Jahr"))
     if len(years) < 2:
         return empty_fig("Mindestens zwei Jahre notwendig.")
     first, last = years[0], years[-1]
-    g = d.groupby(["Bundesland", "Jahr"])["Oper insgesamt"].sum().reset_index()
+    g = total.sum_by(["Bundesland", "Jahr"])
     start = g[g["Jahr"] == first].set_index("Bundesland")["Oper insgesamt"]
     end = g[g["Jahr"] == last].set_index("Bundesland")["Oper insgesamt"]
     diff = (end - start).dropna().reset_index()
@@ -1144,7 +2614,7 @@ def fig_diverg(d):
 def fig_gender(d):
     if d.empty:
         return empty_fig()
-    g = d.groupby(["Region", "Bundesland"])[
+    g = d.groupby(["Region", "Bundesland"], observed=True)[
         ["Opfer maennlich", "Opfer weiblich"]
     ].sum().reset_index()
     fig = px.scatter(
@@ -1159,6 +2629,167 @@ def fig_gender(d):
     return fig
 
 
+# --------- CLIENTSIDE CUBE ---------
+# Optional mode: the browser gets a state-level copy of the aggregate cube once
+# and computes the KPI cards, fig_trend, fig_top5 and fig_state_trend itself
+# (assets/clientside_cube.js), so filter changes for them never reach Python.
+CLIENTSIDE_CUBE = os.environ.get("CRIME_DASH_CLIENTSIDE_CUBE", "0") == "1"
+CLIENT_CUBE_METRICS = [
+    "Oper insgesamt",
+    "Opfer maennlich",
+    "Opfer weiblich",
+    "Opfer Kinder bis 14 Jahre- insgesamt",
+    "Opfer Jugendliche 14 bis unter 18 Jahre - insgesamt",
+]
+_CLIENT_CUBE = None
+
+
+def _typed_array(values):
+    """numpy array as {dtype, shape, bdata}: little-endian bytes, base64 encoded."""
+    return {
+        "dtype": values.dtype.name,
+        "shape": list(values.shape),
+        "bdata": base64.b64encode(values.astype(values.dtype.newbyteorder("<")).tobytes()).decode("ascii"),
+    }
+
+
+def _figure_skeleton(fig):
+    """Figure JSON without the shared template; the browser only swaps the data arrays."""
+    skeleton = json.loads(fig.to_json())
+    skeleton["layout"].pop("template", None)
+    return skeleton
+
+
+def client_cube_payload(cube):
+    """
+    CUBE reduced to [Jahr, Straftat_kurz, Bundesland, metric] plus the matching
+    row-presence cube, and figure skeletons built by the server-side builders
+    from the full selection. Regions without a Bundesland get a trailing
+    state slot labelled null, like NaN in the server-side views.
+    """
+    state_codes = cube.region_state_codes
+    states = [str(s) for s in cube.states]
+    if (state_codes < 0).any():
+        state_codes = np.where(state_codes < 0, len(states), state_codes)
+        states.append(None)
+    metrics = [m for m in CLIENT_CUBE_METRICS if m in cube.metrics]
+    metric_idx = [cube.metrics.index(m) for m in metrics]
+
+    shape = (len(cube.years), len(cube.crimes), len(states))
+    values = np.zeros(shape + (len(metrics),), dtype=np.int64)
+    rows = np.zeros(shape, dtype=np.int64)
+    for s in range(len(states)):
+        in_state = state_codes == s
+        values[:, :, s] = cube.values[:, :, in_state][..., metric_idx].sum(axis=2)
+        rows[:, :, s] = cube.rows[:, :, in_state].sum(axis=2)
+    dtype = np.uint32 if values.max(initial=0) < 2 ** 32 else np.float64
+
+    # the remainders are computed per region (CubeView._subcube), then reduced
+    remainders = CubeView.remainder_terms(cube, sorted(CRIME_HIERARCHY.remainders))
+    rest, _ = CubeView(cube, remainders=remainders)._subcube(metrics)
+    rest = rest[:, len(cube.crimes):]
+    rest_values = np.zeros((len(cube.years), len(remainders), len(states), len(metrics)), dtype=np.int64)
+    for s in range(len(states)):
+        rest_values[:, :, s] = rest[:, :, state_codes == s].sum(axis=2)
+    rest_dtype = np.int32 if np.abs(rest_values).max(initial=0) < 2 ** 31 else np.float64
+
+    crimes = [str(c) for c in cube.crimes]
+    full = cube.view()
+    return {
+        "years": [int(y) for y in cube.years],
+        "crimes": crimes,
+        "states": states,
+        "metrics": metrics,
+        # crime hierarchy for the level selection (CrimeHierarchy.level_nodes)
+        "crime_parents": [
+            crimes.index(CRIME_HIERARCHY.parent[c]) if CRIME_HIERARCHY.parent.get(c) in crimes else -1
+            for c in crimes
+        ],
+        "levels": list(CRIME_LEVELS),
+        # derived categories of CubeView.at_level: [label, parent] and their
+        # values, [Jahr, remainder, Bundesland, metric]; rows are the parent's
+        "remainders": [[name, parent] for name, parent, _ in remainders],
+        "remainder_values": _typed_array(rest_values.astype(rest_dtype)),
+        # categories counted by the "Deliktsgruppen" KPI
+        "crime_types": [c != TOTAL_CRIME for c in crimes],
+        "values": _typed_array(values.astype(dtype)),
+        "rows": _typed_array((rows > 0).astype(np.uint8)),
+        "template": pio.templates[pio.templates.default].to_plotly_json(),
+        "figures": {
+            "trend": _figure_skeleton(fig_trend(full)),
+            "top5": _figure_skeleton(fig_top5(full)),
+            "state_trend": _figure_skeleton(fig_state_trend(full)),
+            "empty": _figure_skeleton(empty_fig()),
+        },
+    }
+
+
+def client_cube():
+    """client_cube_payload(CUBE), built once."""
+    global _CLIENT_CUBE
+    if _CLIENT_CUBE is None:
+        _CLIENT_CUBE = client_cube_payload(CUBE)
+    return _CLIENT_CUBE
+
+
+# --------- BACKGROUND CALLBACKS ---------
+# Optional mode (CRIME_DASH_BACKGROUND=1, needs pip install "dash[diskcache]"):
+# the map and children-ranking callbacks run as background jobs, each a forked
+# process with the loaded data, and the renderer terminates the previous job of
+# a callback as soon as its inputs change. Results are reused for the lifetime
+# of the server process tree (gunicorn workers forked from a preloaded app
+# share the token).
+# Off by default: a job's figure and filter caches die with its process, and
+# Dash starts a job (fork plus at least one poll) even for a cached result, so
+# every call costs 110-200 ms plus BACKGROUND_POLL_MS. In the request thread a
+# cold map takes about as long and a repeated one is a figure cache hit (~1 ms).
+BACKGROUND_CALLBACKS = os.environ.get("CRIME_DASH_BACKGROUND", "0") == "1"
+BACKGROUND_CACHE_DIR = os.path.join(CACHE_DIR, "callbacks")
+BACKGROUND_POLL_MS = 250
+BACKGROUND_RESULT_TTL = 3600
+_BACKGROUND_RUN = f"{os.getpid()}-{time.time_ns()}"
+
+BACKGROUND_MANAGER = None
+if BACKGROUND_CALLBACKS:
+    try:
+        import diskcache
+        from dash import DiskcacheManager
+
+        BACKGROUND_MANAGER = DiskcacheManager(
+            diskcache.Cache(BACKGROUND_CACHE_DIR),
+            cache_by=[lambda: _BACKGROUND_RUN],
+            expire=BACKGROUND_RESULT_TTL,
+        )
+    except ImportError:
+        print("CRIME_DASH_BACKGROUND=1 ohne diskcache: Callbacks laufen im Request-Thread.")
+
+
+def heavy_callback(*dependencies, running=None, cancel=None):
+    """
+    app.callback for expensive figures. `running` is shown in both modes;
+    `cancel` (inputs that abort a running job) only applies to background jobs,
+    which do not share this process's figure and filter caches.
+    """
+    if BACKGROUND_MANAGER is None:
+        return app.callback(*dependencies, running=running)
+    return app.callback(
+        *dependencies,
+        background=True,
+        manager=BACKGROUND_MANAGER,
+        interval=BACKGROUND_POLL_MS,
+        running=running,
+        cancel=cancel,
+    )
+
+
+def running_state(wrapper_id, status_id, message):
+    """`running` spec: dim the figure wrapper and show `message` while the job runs."""
+    return [
+        (Output(wrapper_id, "style"), {"opacity": 0.4, "transition": "opacity 0.2s"}, {"opacity": 1}),
+        (Output(status_id, "children"), message, ""),
+    ]
+
+
 # --------- DASH APP ---------
 app = Dash(
     __name__,
@@ -1166,6 +2797,26 @@ app = Dash(
     suppress_callback_exceptions=True,
 )
 app.title = "Crime Analysis Dashboard"
+server = app.server
+
+
+@server.before_request
+def _warm_up():
+    # the server is up and taking requests: load the data (first request only)
+    # and start loading the geo layers in the background
+    ensure_data()
+    start_geo_loading()
+
+
+@server.route("/healthz")
+def healthz():
+    """"serving" as soon as requests are answered, "warm" once the geo layers are loaded."""
+    return {
+        "status": "warm" if GEO_STATUS == "ready" else "serving",
+        "geo": GEO_STATUS,
+        "startup": STARTUP_TIMES,
+    }
+
 
 # --------- SIDEBAR ---------
 def sidebar_layout(path):
@@ -1341,6 +2992,8 @@ def layout_geo():
 
             # Store bleibt, weil wir weiterhin per Klick Bundesland auswählen
             dcc.Store(id="selected-state-store", data=None),
+            # signature of the map layer on the client (see map_layer_signature)
+            dcc.Store(id="map-layer", data=None),
 
             # ===== FILTERLEISTE ÜBER DER KARTE =====
             html.Div(
@@ -1415,7 +3068,8 @@ def layout_geo():
             ),
             # ===== ENDE FILTERLEISTE =====
 
-            dcc.Graph(id="map"),
+            html.Div(id="map-status", className="text-muted small"),
+            html.Div(id="map-wrap", children=[dcc.Graph(id="map")]),
             html.Br(),
             dcc.Graph(id="statebar"),
             html.Br(),
@@ -1621,19 +3275,25 @@ def layout_trends():
                 ],
             ),
 
-            dcc.Graph(
-                id="trend-children-cities",
-                style={
-                     "width": "100%",
-                     "maxWidth": "100%",              # ensure no internal limit
-                     "height": f"{STANDARD_HEIGHT}px"
-                 },
-                config={"responsive": True},         # let Plotly stretch with container
-            ),
-            html.Br(),
-            dcc.Graph(
-                id="trend-children-bar",
-                style={"width": "100%", "height": f"{STANDARD_HEIGHT}px"},
+            html.Div(id="trend-children-status", className="text-muted small"),
+            html.Div(
+                id="trend-children-wrap",
+                children=[
+                    dcc.Graph(
+                        id="trend-children-cities",
+                        style={
+                             "width": "100%",
+                             "maxWidth": "100%",              # ensure no internal limit
+                             "height": f"{STANDARD_HEIGHT}px"
+                         },
+                        config={"responsive": True},         # let Plotly stretch with container
+                    ),
+                    html.Br(),
+                    dcc.Graph(
+                        id="trend-children-bar",
+                        style={"width": "100%", "height": f"{STANDARD_HEIGHT}px"},
+                    ),
+                ],
             ),
 
             html.H3("3. Steigt die Gewalt gegen Frauen an?"),
@@ -1645,7 +3305,9 @@ def fig_city_danger(d, top_n=10, color_scale="OrRd"):
     if d.empty:
         return empty_fig("Keine Daten verfügbar")
 
-    g = d.groupby(["Region", "Jahr"])["Oper insgesamt"].sum().reset_index()
+    g = d.groupby(["Region", "Jahr"], observed=True)["Oper insgesamt"].sum().reset_index()
+    # counts are unsigned; widen before taking differences
+    g["Oper insgesamt"] = g["Oper insgesamt"].astype("int64")
     years = sorted(g["Jahr"].unique())
     if len(years) < 2:
         return empty_fig("Mindestens zwei Jahre notwendig (z.B. 2019 und 2024).")
@@ -1702,9 +3364,10 @@ def fig_children_ranking(d, top_n=10, mode="dangerous", age_group="Kinder <14"):
     mode = "dangerous" -> Städte mit den meisten Kinderopfern (Top N, rot)
     mode = "safe"      -> Städte mit den wenigsten Kinderopfern (Top N, grün)
     """
-    if d.empty or gdf_cities is None:
+    if GEO_STORE is None:
+        return geo_unavailable_fig("Keine Geodaten für Kinder (0–14) verfügbar.")
+    if d.empty:
         return empty_fig("Keine Geodaten für Kinder (0–14) verfügbar.")
-
     # Selected age group column (falls back to Kinder <14)
     if age_group not in AGE_COLS:
         age_group = "Kinder <14"
@@ -1712,32 +3375,19 @@ def fig_children_ranking(d, top_n=10, mode="dangerous", age_group="Kinder <14"):
     if col_children not in d.columns:
         return empty_fig(f"Keine Daten für {age_group} verfügbar.")
 
-    # --- Kinderopfer nach Region + Bundesland ---
-    g_children = (
-        d.groupby(["Region", "Bundesland"])[col_children]
-        .sum()
-        .reset_index()
-        .rename(columns={col_children: "Kinder_0_14"})
+    # --- Kinder- und Gesamtopfer je Stadt-Shape (über den Region-Crosswalk) ---
+    g = sum_by_city(d, [col_children, "Oper insgesamt"]).rename(
+        columns={col_children: "Kinder_0_14", "Oper insgesamt": "Gesamtopfer"}
     )
 
-    if g_children.empty:
+    if g.empty:
         return empty_fig("Zu wenige Daten für Kinder (0–14).")
 
-    # --- Gesamtopfer nach Region + Bundesland (für Hover) ---
-    g_total = (
-        d.groupby(["Region", "Bundesland"])["Oper insgesamt"]
-        .sum()
-        .reset_index()
-        .rename(columns={"Oper insgesamt": "Gesamtopfer"})
-    )
-
-    g = g_children.merge(g_total, on=["Region", "Bundesland"], how="left")
-    g["Gesamtopfer"] = g["Gesamtopfer"].fillna(0)
-
     # Anteil Kinder an allen Opfern (in %), nur für Tooltip
+    # counts are stored in narrow integer types; widen before scaling by 100
     g["Anteil_Kinder"] = np.where(
         g["Gesamtopfer"] > 0,
-        100 * g["Kinder_0_14"] / g["Gesamtopfer"],
+        100 * g["Kinder_0_14"].astype("float64") / g["Gesamtopfer"],
         0.0,
     )
 
@@ -1752,38 +3402,13 @@ def fig_children_ranking(d, top_n=10, mode="dangerous", age_group="Kinder <14"):
     if g.empty:
         return empty_fig("Keine Städte für diese Auswahl gefunden.")
 
-    # --- Zuordnung Region ↔ Stadt-Shapes (gdf_cities) ---
-    gdf = gdf_cities.copy()
-    gdf["Kinder_0_14"] = np.nan
-    gdf["Gesamtopfer"] = np.nan
-    gdf["Anteil_Kinder"] = np.nan
-
-    def find_matching_city_idx(region_name, bundesland_name):
-        """Versucht, eine Stadt im Shape-File zu finden, die zur Region passt."""
-        region_lower = str(region_name).lower()
-        subset = gdf[gdf["Bundesland"] == bundesland_name]
-        for idx, city in subset["City"].items():
-            city_lower = str(city).lower()
-            if region_lower in city_lower or city_lower in region_lower:
-                return idx
-        return None
-
-    # Werte in GeoDataFrame schreiben (nur Top-N-Städte)
-    for _, row in g.iterrows():
-        idx = find_matching_city_idx(row["Region"], row["Bundesland"])
-        if idx is not None:
-            gdf.at[idx, "Kinder_0_14"] = row["Kinder_0_14"]
-            gdf.at[idx, "Gesamtopfer"] = row["Gesamtopfer"]
-            gdf.at[idx, "Anteil_Kinder"] = row["Anteil_Kinder"]
-
-    # Nur Städte mit zugeordneten Kinderwerten behalten
-    gdf_plot = gdf.dropna(subset=["Kinder_0_14"]).copy()
+    # --- Werte an die Stadt-Features hängen (ein Join über den Stadt-Code) ---
+    gdf_plot = GEO_STORE.city_attrs.join(g, on="city_code", how="inner")
     if gdf_plot.empty:
         return empty_fig("Keine Zuordnung Stadt ↔ Region möglich.")
 
-    # ID-Spalte für Verbindung GeoJSON ↔ DataFrame
-    gdf_plot = gdf_plot.reset_index().rename(columns={"index": "id"})
-    geojson_data = json.loads(gdf_plot.to_json())
+    # Index = Feature-ID im GeometryStore; nur die gezeichneten Polygone mitschicken
+    geojson_data = GEO_STORE.city_geojson(ids=gdf_plot.index, zoom=ZOOM_GERMANY)
 
     # Farbskala nach Modus
     # Semantic danger scale: green → yellow → orange → red
@@ -1804,8 +3429,7 @@ def fig_children_ranking(d, top_n=10, mode="dangerous", age_group="Kinder <14"):
     fig = px.choropleth_map(
         gdf_plot,
         geojson=geojson_data,
-        locations="id",
-        featureidkey="properties.id",
+        locations=gdf_plot.index,
         color="Kinder_0_14",
         hover_name="City",
         hover_data={
@@ -1818,7 +3442,7 @@ def fig_children_ranking(d, top_n=10, mode="dangerous", age_group="Kinder <14"):
         labels={"Kinder_0_14": f"Opfer ({age_group})"},
         title=f"Top {top_n} {title_mode} Städte – Opfer ({age_group})",
         center={"lat": 51.0, "lon": 10.2},
-        zoom=4.5,
+        zoom=ZOOM_GERMANY,
         map_style="carto-positron",  # gleiche Stil-Familie wie moderne Dash-Beispiele
     )
 
@@ -1844,7 +3468,6 @@ def fig_children_bar(d, top_n=10, mode="dangerous", age_group="Kinder <14"):
         return empty_fig("Bitte eine Top-N Auswahl treffen, um das Balkendiagramm zu sehen.")
     if d.empty:
         return empty_fig("Keine Daten verfügbar")
-
     # Selected age group column (falls back to Kinder <14)
     if age_group not in AGE_COLS:
         age_group = "Kinder <14"
@@ -1853,7 +3476,7 @@ def fig_children_bar(d, top_n=10, mode="dangerous", age_group="Kinder <14"):
         return empty_fig(f"Keine Daten für {age_group} verfügbar.")
 
     g = (
-        d.groupby(["Region", "Bundesland"])[col_children]
+        d.groupby(["Region", "Bundesland"], observed=True)[col_children]
         .sum()
         .reset_index()
         .rename(columns={col_children: "Kinder_0_14"})
@@ -1918,13 +3541,19 @@ def fig_violence_women(d):
         "Raub in Wohnungen",
     ]
 
-    d2 = d[d["Straftat_kurz"].isin(violence_categories)]
+    # only the outermost selected violent categories, so nested rows
+    # (e.g. the Raub sub-rows inside Gewaltkriminalität) are not added twice
+    violent = set(CRIME_HIERARCHY.subtree(violence_categories))
+    present = [c for c in d["Straftat_kurz"].unique() if c in violent]
+    if not present:
+        return empty_fig("Keine Daten zur Gewalt gegen Frauen verfügbar")
+    d2 = d[d["Straftat_kurz"].isin(CRIME_HIERARCHY.level_nodes(LEVEL_TOTAL, present))]
 
     if d2.empty:
         return empty_fig("Keine Daten zur Gewalt gegen Frauen verfügbar")
 
     g = (
-        d2.groupby("Jahr")["Opfer weiblich"]
+        d2.groupby("Jahr", observed=True)["Opfer weiblich"]
         .sum()
         .reset_index()
         .sort_values("Jahr")
@@ -2005,6 +3634,13 @@ app.layout = html.Div(
         ),
         dcc.Location(id="url"),
         dcc.Store(id="sidebar-visible", data=True),
+        # canonical sidebar selection (JSON selection_key), see update_selection
+        dcc.Store(id="selection"),
+        # state-level cube for the clientside callbacks (CLIENTSIDE_CUBE mode)
+        *([dcc.Store(id="client-cube")] if CLIENTSIDE_CUBE else []),
+        # geo loading state, polled until the background loader is done
+        dcc.Store(id="geo-ready", data=GEO_STATUS),
+        dcc.Interval(id="geo-poll", interval=1000),
         html.Div(id="sidebar"),
         html.Div(id="page-content", style=CONTENT_STYLE),
     ]
@@ -2031,6 +3667,19 @@ def render_page(path):
         return layout_temporal()
     return html.Div([html.H2("404 – Seite nicht gefunden")])
 
+# --------- GEO LOADING CALLBACK ---------
+@app.callback(
+    Output("geo-ready", "data"),
+    Output("geo-poll", "disabled"),
+    Input("geo-poll", "n_intervals"),
+)
+def poll_geo_loading(_):
+    """Publish the geo status once the loader is done and stop polling."""
+    if not GEO_READY.is_set():
+        return no_update, False
+    return GEO_STATUS, True
+
+
 # --------- SIDEBAR TOGGLE CALLBACKS ---------
 # Toggle sidebar visibility store
 @app.callback(
@@ -2066,39 +3715,109 @@ def update_sidebar_visibility(visible):
         return hidden_sidebar, expanded_content
 
 
-# --------- OVERVIEW CALLBACK ---------
+# --------- CUBE CALLBACKS ---------
+def register_cube_callback(func, js_name, outputs, filter_inputs):
+    """
+    Register `func` as a server callback on the selection store or, in
+    CLIENTSIDE_CUBE mode, its counterpart `js_name` from
+    assets/clientside_cube.js. The clientside version reads the sidebar
+    filters directly (no server round-trip) plus the client-cube store.
+    """
+    if CLIENTSIDE_CUBE:
+        app.clientside_callback(
+            ClientsideFunction("crime_cube", js_name),
+            *outputs,
+            *filter_inputs,
+            Input("client-cube", "data"),
+        )
+    else:
+        app.callback(*outputs, Input("selection", "data"))(func)
+
+
+if CLIENTSIDE_CUBE:
+    @app.callback(
+        Output("client-cube", "data"),
+        Input("url", "pathname"),
+        State("client-cube", "data"),
+    )
+    def load_client_cube(_, current):
+        """Ship the cube once per page load."""
+        return no_update if current is not None else client_cube()
+
+
+# --------- SELECTION CALLBACK ---------
 @app.callback(
-    Output("kpi-total-victims", "children"),
-    Output("kpi-victims-per-year", "children"),
-    Output("kpi-male-female", "children"),
-    Output("kpi-under18-adults", "children"),
-    Output("kpi-crime-types", "children"),
-    Output("trend", "figure"),
-    Output("top5", "figure"),
-    Output("donut", "figure"),
-    Output("crime-pie", "figure"),
+    Output("selection", "data"),
     Input("filter-year", "value"),
+    Input("filter-crime", "value"),
     Input("filter-state", "value"),
+    State("selection", "data"),
 )
-def update_overview(years, states):
-    d = filter_data(years or YEARS, [], states or [])
+def update_selection(years, crimes, states, current):
+    """
+    The one callback on the sidebar filters: filters the data once (it stays
+    in the filter cache under the selection key, as all rows and at the total
+    level most figures sum) and publishes the key, which all page callbacks
+    read.
+    """
+    key = selection_key(years or YEARS, crimes or [], states or [])
+    selection = json.dumps(key, ensure_ascii=False)
+    if selection == current:
+        return no_update
+    filter_data(*key)
+    filter_data(*key, level=LEVEL_TOTAL)
+    return selection
+
+
+# --------- OVERVIEW CALLBACK ---------
+def update_overview_cards(selection):
+    key = overview_key(parse_selection(selection))
+    c = cube_view(*key)
     (
         total_victims,
         victims_per_year,
         male_female,
         under18_adults,
         crime_types,
-    ) = build_kpis(d)
+    ) = build_kpis(c)
     return (
         total_victims,
         victims_per_year,
         male_female,
         under18_adults,
         crime_types,
-        fig_trend(d),
-        fig_top5(d),
-        fig_donut(d),
-        fig_crime_pie(d),
+        cached_figure(fig_trend, key, c),
+        cached_figure(fig_top5, key, c),
+    )
+
+
+register_cube_callback(
+    update_overview_cards,
+    "overviewCards",
+    [
+        Output("kpi-total-victims", "children"),
+        Output("kpi-victims-per-year", "children"),
+        Output("kpi-male-female", "children"),
+        Output("kpi-under18-adults", "children"),
+        Output("kpi-crime-types", "children"),
+        Output("trend", "figure"),
+        Output("top5", "figure"),
+    ],
+    [Input("filter-year", "value"), Input("filter-state", "value")],
+)
+
+
+@app.callback(
+    Output("donut", "figure"),
+    Output("crime-pie", "figure"),
+    Input("selection", "data"),
+)
+def update_overview(selection):
+    key = overview_key(parse_selection(selection))
+    c = cube_view(*key)
+    return (
+        cached_figure(fig_donut, key, c),
+        cached_figure(fig_crime_pie, key, c),
     )
 
 
@@ -2143,35 +3862,73 @@ def update_selected_state(click_data, back_clicks, filter_states, current_state)
     # clicking on the map should do nothing
     return current_state
 
-@app.callback(
+# Choropleth trace properties that depend on the selection. Everything else
+# (GeoJSON, hover template, color scale, title) is fixed by the map layer.
+MAP_DATA_PROPS = ("locations", "z", "customdata", "hovertext")
+
+
+def map_layer_signature(selected_state, city_mode, age_group, safety_mode):
+    """
+    Identifies what fig_geo_map draws apart from the values. None for the
+    Top-N city views, whose polygons depend on the selection.
+    """
+    if isinstance(city_mode, int) or GEO_STORE is None:
+        return None
+    return [selected_state, city_mode, age_group, safety_mode]
+
+
+def map_patch(fig):
+    """Partial update that swaps the values of the map trace and keeps its GeoJSON."""
+    patch = Patch()
+    trace = fig["data"][0]
+    for prop in MAP_DATA_PROPS:
+        patch["data"][0][prop] = trace.get(prop)
+    return patch
+
+
+@heavy_callback(
     Output("map", "figure"),
     Output("statebar", "figure"),
     Output("topregions", "figure"),
     Output("current-state-display", "children"),
     Output("state-back-button", "style"),
-    Input("filter-year", "value"),
-    Input("filter-crime", "value"),
-    Input("filter-state", "value"),
+    Output("map-layer", "data"),
+    Input("selection", "data"),
     Input("selected-state-store", "data"),
     Input("geo-city-mode", "value"),
     Input("geo-age-group", "value"),
     Input("geo-safety-mode", "value"),
+    Input("geo-ready", "data"),
+    State("map-layer", "data"),
+    running=running_state("map-wrap", "map-status", "Karte wird berechnet …"),
+    cancel=[Input("url", "pathname")],
 )
 def update_geo_components(
-    years, crimes, states, selected_state, city_mode, age_group, safety_mode
+    selection, selected_state, city_mode, age_group, safety_mode, _geo, client_layer
 ):
-    d = filter_data(years or YEARS, crimes or [], states or [])
+    key = parse_selection(selection)
+    d = filter_data(*key, level=LEVEL_TOTAL)
 
-    map_fig = fig_geo_map(
+    map_fig = cached_figure(
+        fig_geo_map,
+        key,
         d,
         selected_state=selected_state,
         city_mode=city_mode,
         age_group=age_group,
         safety_mode=safety_mode,
     )
-
-    state_bar_fig = fig_geo_state_bar(d)
-    top_regions_fig = fig_geo_top(d)
+    layer = map_layer_signature(selected_state, city_mode, age_group, safety_mode)
+    if not (len(map_fig["data"]) == 1 and "geojson" in map_fig["data"][0]):
+        # placeholder / empty figure: the next map must be sent in full
+        layer = None
+    elif layer is not None and layer == client_layer:
+        # same polygons on the client: only send the new values
+        map_fig = map_patch(map_fig)
+
+    c = cube_view(*key)
+    state_bar_fig = cached_figure(fig_geo_state_bar, key, c)
+    top_regions_fig = cached_figure(fig_geo_top, key, c)
 
     # Update info text
     if selected_state:
@@ -2185,7 +3942,7 @@ def update_geo_components(
         )
         back_style = {"display": "none"}
 
-    return map_fig, state_bar_fig, top_regions_fig, text, back_style
+    return map_fig, state_bar_fig, top_regions_fig, text, back_style, layer
 
 
 # --------- CRIME TYPES CALLBACK ---------
@@ -2193,63 +3950,80 @@ def update_geo_components(
     Output("heat", "figure"),
     Output("stacked", "figure"),
     Output("agechart", "figure"),
-    Output("top5-crime", "figure"),
     Output("donut-crime", "figure"),
-    Input("filter-year", "value"),
-    Input("filter-crime", "value"),
-    Input("filter-state", "value"),
+    Input("selection", "data"),
     Input("age-crime", "value"),
 )
-def update_crime(years, crimes, states, age_crime_sel):
-    d = filter_data(years or YEARS, crimes or [], states or [])
+def update_crime(selection, age_crime_sel):
+    key = parse_selection(selection)
+    d = filter_data(*key)
+    c = cube_view(*key)
+
+    heat_fig = cached_figure(fig_heatmap, key, c)
+    stacked_fig = cached_figure(fig_stacked, key, c)
+    age_fig = cached_figure(fig_age, key, d, crime=age_crime_sel)
+    donut_fig = cached_figure(fig_donut, key, c)
 
-    heat_fig = fig_heatmap(d)
-    stacked_fig = fig_stacked(d)
-    age_fig = fig_age(d, age_crime_sel)
-    top5_fig = fig_top5(d)
-    donut_fig = fig_donut(d)
+    return heat_fig, stacked_fig, age_fig, donut_fig
 
-    return heat_fig, stacked_fig, age_fig, top5_fig, donut_fig
+
+def update_crime_top5(selection):
+    key = parse_selection(selection)
+    return cached_figure(fig_top5, key, cube_view(*key))
+
+
+register_cube_callback(
+    update_crime_top5,
+    "top5",
+    [Output("top5-crime", "figure")],
+    [Input("filter-year", "value"), Input("filter-crime", "value"), Input("filter-state", "value")],
+)
 
 
 # Trends Callback (city danger)
 @app.callback(
     Output("city-danger", "figure"),
-    Input("filter-year", "value"),
-    Input("filter-crime", "value"),
-    Input("filter-state", "value"),
+    Input("selection", "data"),
     Input("city-count", "value"),
     Input("city-color-scale", "value"),
 )
-def update_city_danger(years, crimes, states, top_n, color_scale):
-    d = filter_data(years or YEARS, crimes or [], states or [])
-    return fig_city_danger(
-        d,
+def update_city_danger(selection, top_n, color_scale):
+    key = parse_selection(selection)
+    return cached_figure(
+        fig_city_danger,
+        key,
+        filter_data(*key, level=LEVEL_TOTAL),
         top_n=top_n or 10,
         color_scale=color_scale or "OrRd",
     )
 
 
 # Trends Callback: Children 0–14 ranking (map + bar)
-@app.callback(
+@heavy_callback(
     Output("trend-children-cities", "figure"),
     Output("trend-children-bar", "figure"),
-    Input("filter-year", "value"),
-    Input("filter-crime", "value"),
-    Input("filter-state", "value"),
+    Input("selection", "data"),
     Input("trend-children-topn", "value"),
     Input("trend-children-mode", "value"),
     Input("trend-age-group", "value"),
+    Input("geo-ready", "data"),
+    running=running_state("trend-children-wrap", "trend-children-status", "Ranking wird berechnet …"),
+    cancel=[Input("url", "pathname")],
 )
-def update_trend_children_cities(years, crimes, states, top_n, mode, age_group):
-    d = filter_data(years or YEARS, crimes or [], states or [])
-    map_fig = fig_children_ranking(
+def update_trend_children_cities(selection, top_n, mode, age_group, _geo):
+    key = parse_selection(selection)
+    d = filter_data(*key, level=LEVEL_TOTAL)
+    map_fig = cached_figure(
+        fig_children_ranking,
+        key,
         d,
         top_n=top_n or 10,
         mode=mode or "dangerous",
         age_group=age_group or "Kinder <14",
     )
-    bar_fig = fig_children_bar(
+    bar_fig = cached_figure(
+        fig_children_bar,
+        key,
         d,
         top_n=top_n or 10,
         mode=mode or "dangerous",
@@ -2261,30 +4035,46 @@ def update_trend_children_cities(years, crimes, states, top_n, mode, age_group):
 #viollence against Women callback
 @app.callback(
     Output("trend-women-violence", "figure"),
-    Input("filter-year", "value"),
-    Input("filter-crime", "value"),
-    Input("filter-state", "value"),
+    Input("selection", "data"),
 )
-def update_trend_violence_women(years, crimes, states):
-    d = filter_data(years or YEARS, crimes or [], states or [])
-    return fig_violence_women(d)
+def update_trend_violence_women(selection):
+    key = parse_selection(selection)
+    return cached_figure(fig_violence_women, key, filter_data(*key))
 
 
 # --------- TEMPORAL CALLBACK ---------
 @app.callback(
-    Output("trendstates", "figure"),
     Output("diverg", "figure"),
     Output("gender", "figure"),
-    Input("filter-year", "value"),
-    Input("filter-crime", "value"),
-    Input("filter-state", "value"),
+    Input("selection", "data"),
 )
-def update_temporal(years, crimes, states):
-    d = filter_data(years or YEARS, crimes or [], states or [])
-    return fig_state_trend(d), fig_diverg(d), fig_gender(d)
+def update_temporal(selection):
+    key = parse_selection(selection)
+    c = cube_view(*key)
+    return (
+        cached_figure(fig_diverg, key, c),
+        cached_figure(fig_gender, key, filter_data(*key, level=LEVEL_TOTAL)),
+    )
+
+
+def update_state_trend(selection):
+    key = parse_selection(selection)
+    return cached_figure(fig_state_trend, key, cube_view(*key))
+
+
+register_cube_callback(
+    update_state_trend,
+    "stateTrend",
+    [Output("trendstates", "figure")],
+    [Input("filter-year", "value"), Input("filter-crime", "value"), Input("filter-state", "value")],
+)
+
 
+record_phase("import app.py", time.perf_counter() - _START)
 
 if __name__ == "__main__":
+    # load while this is the only thread, so the CSV ingest may fork its workers
+    ensure_data()
     app.run(debug=True)
 
 
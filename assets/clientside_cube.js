@@ -0,0 +1,421 @@
+/*
+ * Clientside versions of build_kpis, fig_trend, fig_top5 and fig_state_trend
+ * (CRIME_DASH_CLIENTSIDE_CUBE=1). They read the state-level cube that
+ * client_cube_payload() in app.py puts into the "client-cube" store and fill
+ * the figure skeletons shipped with it, so the results match the server side.
+ */
+(function () {
+    "use strict";
+
+    const TYPED = {uint8: Uint8Array, int32: Int32Array, uint32: Uint32Array, float64: Float64Array};
+    let decoded = {cube: null};
+
+    function decode(spec) {
+        const bin = atob(spec.bdata);
+        const bytes = new Uint8Array(bin.length);
+        for (let i = 0; i < bin.length; i++) {
+            bytes[i] = bin.charCodeAt(i);
+        }
+        return new TYPED[spec.dtype](bytes.buffer);
+    }
+
+    // crime nodes: the cube's crimes, then the derived remainders (CrimeHierarchy.remainders)
+    function arrays(cube) {
+        if (decoded.cube !== cube) {
+            decoded = {
+                cube: cube,
+                values: decode(cube.values),
+                rows: decode(cube.rows),
+                remainderValues: decode(cube.remainder_values),
+                labels: cube.crimes.concat(cube.remainders.map(function (r) {
+                    return r[0];
+                })),
+                parents: cube.crime_parents.concat(cube.remainders.map(function (r) {
+                    return r[1];
+                })),
+            };
+        }
+        return decoded;
+    }
+
+    // positions of `wanted` in `labels`; empty selection = everything
+    function positions(labels, wanted) {
+        const out = [];
+        labels.forEach(function (label, i) {
+            if (!wanted || !wanted.length || wanted.indexOf(label) >= 0) {
+                out.push(i);
+            }
+        });
+        return out;
+    }
+
+    // CubeView counterpart
+    function select(cube, years, crimes, states) {
+        const a = arrays(cube);
+        return {
+            cube: cube,
+            values: a.values,
+            rows: a.rows,
+            remainderValues: a.remainderValues,
+            labels: a.labels,
+            parents: a.parents,
+            crimes: crimes,
+            y: positions(cube.years, years),
+            c: positions(cube.crimes, crimes),
+            s: positions(cube.states, states),
+        };
+    }
+
+    function ancestors(sel, c) {
+        const out = [];
+        for (let p = sel.parents[c]; p >= 0; p = sel.parents[p]) {
+            out.push(p);
+        }
+        return out;
+    }
+
+    // CrimeHierarchy.level_nodes, as crime node positions
+    function levelPositions(sel, level) {
+        const depth = sel.cube.levels.indexOf(level);
+        const all = !sel.crimes || !sel.crimes.length;
+        const chosen = all ? sel.labels.map(function (_, i) {
+            return i;
+        }) : positions(sel.labels, sel.crimes);
+        const hasChildren = sel.labels.map(function () {
+            return false;
+        });
+        sel.parents.forEach(function (p) {
+            if (p >= 0) {
+                hasChildren[p] = true;
+            }
+        });
+        return sel.labels.map(function (_, c) {
+            return c;
+        }).filter(function (c) {
+            const up = ancestors(sel, c);
+            const underChosen = up.some(function (a) {
+                return chosen.indexOf(a) >= 0;
+            });
+            const covered = chosen.indexOf(c) >= 0 || underChosen;
+            const onLevel = up.length === depth || (up.length < depth && !hasChildren[c]);
+            if (covered && onLevel) {
+                return true;
+            }
+            return chosen.indexOf(c) >= 0 && up.length > depth && !underChosen;
+        });
+    }
+
+    // CubeView.at_level
+    function atLevel(sel, level) {
+        return Object.assign({}, sel, {c: levelPositions(sel, level)});
+    }
+
+    // calls fn(value, y, c, s) for every cell of the selection that has rows;
+    // value(m) is metric m of the cell. A remainder node has the rows of its
+    // parent and its values in remainder_values.
+    function eachObserved(sel, fn) {
+        const C = sel.cube.crimes.length;
+        const R = sel.cube.remainders.length;
+        const S = sel.cube.states.length;
+        const M = sel.cube.metrics.length;
+        sel.y.forEach(function (y) {
+            sel.c.forEach(function (c) {
+                const r = c - C;
+                const base = r >= 0 ? sel.cube.remainders[r][1] : c;
+                sel.s.forEach(function (s) {
+                    const cell = (y * C + base) * S + s;
+                    if (!sel.rows[cell]) {
+                        return;
+                    }
+                    fn(r >= 0 ? function (m) {
+                        return sel.remainderValues[((y * R + r) * S + s) * M + m];
+                    } : function (m) {
+                        return sel.values[cell * M + m];
+                    }, y, c, s);
+                });
+            });
+        });
+    }
+
+    function isEmpty(sel) {
+        let empty = true;
+        eachObserved(sel, function () {
+            empty = false;
+        });
+        return empty;
+    }
+
+    function totals(sel, metrics) {
+        const idx = metrics.map(function (m) {
+            return sel.cube.metrics.indexOf(m);
+        });
+        const sums = metrics.map(function () {
+            return 0;
+        });
+        eachObserved(sel, function (value) {
+            idx.forEach(function (m, i) {
+                if (m >= 0) {
+                    sums[i] += value(m);
+                }
+            });
+        });
+        return sums;
+    }
+
+    // CubeView.sum_by: observed groups only, ordered like the (sorted) axes;
+    // crimes by label, as the remainders come after the cube's crimes
+    function sumBy(sel, dims, metric) {
+        const m = sel.cube.metrics.indexOf(metric);
+        const groups = {};
+        eachObserved(sel, function (value, y, c, s) {
+            if (dims.indexOf("s") >= 0 && sel.cube.states[s] === null) {
+                return;
+            }
+            const pos = {y: y, c: c, s: s};
+            const key = dims.map(function (d) {
+                return pos[d];
+            }).join(",");
+            if (!groups[key]) {
+                groups[key] = {y: y, c: c, s: s, value: 0};
+            }
+            groups[key].value += value(m);
+        });
+        return Object.keys(groups).map(function (key) {
+            return groups[key];
+        }).sort(function (a, b) {
+            for (const d of dims) {
+                if (a[d] !== b[d]) {
+                    if (d === "c") {
+                        return sel.labels[a.c] < sel.labels[b.c] ? -1 : 1;
+                    }
+                    return a[d] - b[d];
+                }
+            }
+            return 0;
+        });
+    }
+
+    // largest n groups, ties in axis order (DataFrame.nlargest)
+    function nlargest(groups, n) {
+        return groups.slice().sort(function (a, b) {
+            return b.value - a.value;
+        }).slice(0, n);
+    }
+
+    function figure(cube, name) {
+        const fig = JSON.parse(JSON.stringify(cube.figures[name]));
+        fig.layout.template = cube.template;
+        return fig;
+    }
+
+    // ---- KPI formatting (format_int / build_kpis) ----
+    const NO_TOTAL = "k. A.";
+
+    function formatInt(x) {
+        return String(Math.trunc(x)).replace(/\B(?=(\d{3})+(?!\d))/g, ".");
+    }
+
+    function pct(part, whole) {
+        if (whole <= 0) {
+            return "0,0 %";
+        }
+        return (100 * part / whole).toFixed(1).replace(".", ",") + " %";
+    }
+
+    // Python's round(): halves go to the even neighbour
+    function roundHalfEven(x) {
+        const r = Math.round(x);
+        return Math.abs(x % 1) === 0.5 ? 2 * Math.round(x / 2) : r;
+    }
+
+    function kpis(sel) {
+        if (isEmpty(sel)) {
+            return ["0", "0", "0 % / 0 %", "0 % / 0 %", "0"];
+        }
+        const total = atLevel(sel, "total");
+        const sums = totals(total, [
+            "Oper insgesamt",
+            "Opfer maennlich",
+            "Opfer weiblich",
+            "Opfer Kinder bis 14 Jahre- insgesamt",
+            "Opfer Jugendliche 14 bis unter 18 Jahre - insgesamt",
+        ]);
+        const victims = sums[0];
+        const crimeTypes = sumBy(sel, ["c"], "Oper insgesamt").filter(function (r) {
+            return sel.cube.crime_types[r.c];
+        }).length;
+        const nYears = sumBy(total, ["y"], "Oper insgesamt").length;
+        if (nYears === 0) {
+            return [NO_TOTAL, NO_TOTAL, NO_TOTAL, NO_TOTAL, String(crimeTypes)];
+        }
+        const perYear = roundHalfEven(victims / nYears);
+        const sexTotal = sums[1] + sums[2];
+        const under18 = sums[3] + sums[4];
+        const adults = Math.max(victims - under18, 0);
+        return [
+            formatInt(victims),
+            formatInt(perYear),
+            pct(sums[1], sexTotal) + " / " + pct(sums[2], sexTotal),
+            pct(under18, victims) + " / " + pct(adults, victims),
+            String(crimeTypes),
+        ];
+    }
+
+    // ---- figures ----
+    // year positions of the selection, and those without a total (years_without_total)
+    function trendYears(sel) {
+        const years = sumBy(sel, ["y"], "Oper insgesamt").map(function (r) {
+            return r.y;
+        });
+        const withTotal = sumBy(atLevel(sel, "total"), ["y"], "Oper insgesamt").map(function (r) {
+            return r.y;
+        });
+        return {
+            all: years,
+            missing: years.filter(function (y) {
+                return withTotal.indexOf(y) < 0;
+            }),
+        };
+    }
+
+    function missingTotalsText(sel, missing) {
+        return "Keine Gesamtzahl in den Quelldaten: " + missing.map(function (y) {
+            return sel.cube.years[y];
+        }).join(", ");
+    }
+
+    // empty_fig(missing_totals_text(...)) for a selection without any total
+    function noTotalFigure(sel, missing) {
+        const fig = figure(sel.cube, "empty");
+        fig.layout.annotations[0].text = missingTotalsText(sel, missing);
+        return fig;
+    }
+
+    // note_missing_totals
+    function noteMissingTotals(sel, fig, missing) {
+        if (missing.length) {
+            fig.layout.annotations = [{
+                showarrow: false,
+                text: missingTotalsText(sel, missing),
+                x: 1,
+                xanchor: "right",
+                xref: "paper",
+                y: 1,
+                yanchor: "bottom",
+                yref: "paper",
+            }];
+        } else {
+            delete fig.layout.annotations;
+        }
+        return fig;
+    }
+
+    function trendFigure(sel) {
+        if (isEmpty(sel)) {
+            return figure(sel.cube, "empty");
+        }
+        const years = trendYears(sel);
+        if (years.missing.length === years.all.length) {
+            return noTotalFigure(sel, years.missing);
+        }
+        const byYear = {};
+        sumBy(atLevel(sel, "total"), ["y"], "Oper insgesamt").forEach(function (r) {
+            byYear[r.y] = r.value;
+        });
+        const fig = figure(sel.cube, "trend");
+        fig.data[0].x = years.all.map(function (y) {
+            return sel.cube.years[y];
+        });
+        // years without a total stay on the axis as a gap
+        fig.data[0].y = years.all.map(function (y) {
+            return y in byYear ? byYear[y] : null;
+        });
+        return noteMissingTotals(sel, fig, years.missing);
+    }
+
+    function top5Figure(sel) {
+        const g = sumBy(atLevel(sel, "offence"), ["c"], "Oper insgesamt");
+        if (!g.length) {
+            return figure(sel.cube, "empty");
+        }
+        const top = nlargest(g, 5).sort(function (a, b) {
+            return a.value - b.value;
+        });
+        const fig = figure(sel.cube, "top5");
+        const values = top.map(function (r) {
+            return r.value;
+        });
+        fig.data[0].x = values;
+        fig.data[0].marker.color = values;
+        fig.data[0].y = top.map(function (r) {
+            return sel.labels[r.c];
+        });
+        return fig;
+    }
+
+    function stateTrendFigure(sel) {
+        if (isEmpty(sel)) {
+            return figure(sel.cube, "empty");
+        }
+        const years = trendYears(sel);
+        if (years.missing.length === years.all.length) {
+            return noTotalFigure(sel, years.missing);
+        }
+        const total = atLevel(sel, "total");
+        const top = nlargest(sumBy(total, ["s"], "Oper insgesamt"), 6).map(function (r) {
+            return r.s;
+        }).sort(function (a, b) {
+            return sel.cube.states[a] < sel.cube.states[b] ? -1 : 1;
+        });
+        const values = {};
+        sumBy(total, ["y", "s"], "Oper insgesamt").forEach(function (r) {
+            values[r.y + "," + r.s] = r.value;
+        });
+        const fig = figure(sel.cube, "state_trend");
+        const skeleton = fig.data;
+        // px: one trace per Bundesland (sorted), Set1 colours in that order;
+        // every line runs over all years, with gaps where a total is missing
+        fig.data = top.map(function (s, i) {
+            const base = skeleton[0];
+            const trace = JSON.parse(JSON.stringify(base));
+            const name = sel.cube.states[s];
+            trace.name = name;
+            trace.legendgroup = name;
+            trace.hovertemplate = base.hovertemplate.replace("Bundesland=" + base.name, "Bundesland=" + name);
+            trace.line.color = skeleton[i % skeleton.length].line.color;
+            trace.x = years.all.map(function (y) {
+                return sel.cube.years[y];
+            });
+            trace.y = years.all.map(function (y) {
+                const key = y + "," + s;
+                return key in values ? values[key] : null;
+            });
+            return trace;
+        });
+        return noteMissingTotals(sel, fig, years.missing);
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        crime_cube: {
+            overviewCards: function (years, states, cube) {
+                if (!cube) {
+                    return Array(7).fill(window.dash_clientside.no_update);
+                }
+                const sel = select(cube, years, [], states);
+                return kpis(sel).concat([trendFigure(sel), top5Figure(sel)]);
+            },
+            top5: function (years, crimes, states, cube) {
+                if (!cube) {
+                    return window.dash_clientside.no_update;
+                }
+                return top5Figure(select(cube, years, crimes, states));
+            },
+            stateTrend: function (years, crimes, states, cube) {
+                if (!cube) {
+                    return window.dash_clientside.no_update;
+                }
+                return stateTrendFigure(select(cube, years, crimes, states));
+            },
+        },
+    });
+})();
@@ -0,0 +1,302 @@
+"""
+Benchmarks for the figure builders and Dash callbacks of app.py.
+
+Runs against the CSVs and GADM layers in the repository root:
+
+    python benchmarks/run.py                    # run and compare with benchmarks/baseline.json
+    python benchmarks/run.py --save             # run and store the result as the new baseline
+    python benchmarks/run.py -k geo_map -r 10   # only cases matching a regex, 10 repetitions
+    python benchmarks/run.py -k geo_map --save  # re-measure some cases, keep the rest of the baseline
+    python benchmarks/run.py --threshold 0.1    # flag everything more than 10 % worse
+
+Per case it records the median and minimum wall time over --repeat runs, the
+peak of Python allocations during one extra run (tracemalloc) and the size of
+the serialized result (figure JSON / callback output). Builders get their
+cube view or filtered frame prepared beforehand; callbacks start with empty
+figure and filter caches unless --warm is given.
+
+A case regresses when its median time, peak memory or output size exceeds the
+baseline by more than --threshold (time also by more than --min-delta-ms).
+The exit status is 1 if any case regressed.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+# app.py reads the CSVs, data/ and .cache/ relative to the working directory
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+import app  # noqa: E402
+from plotly.io.json import to_json_plotly  # noqa: E402
+
+# (years, crimes, states) as in the sidebar; empty = no restriction
+SELECTIONS = {
+    "alle": ((), (), ()),
+    "hessen_2020_2023": ((2020, 2023), (), ("Hessen",)),
+    "raub_bayern": ((), ("Raub & Erpressung", "Raub auf Straßen"), ("Bayern",)),
+}
+DEFAULT_SELECTION = "alle"
+
+# builders that take a CubeView / a filtered frame (at a crime hierarchy
+# level, None = all rows), with their options
+CUBE_BUILDERS = [
+    "build_kpis",
+    "fig_trend",
+    "fig_top5",
+    "fig_donut",
+    "fig_crime_pie",
+    "fig_geo_state_bar",
+    "fig_geo_top",
+    "fig_heatmap",
+    "fig_stacked",
+    "fig_state_trend",
+    "fig_diverg",
+]
+FRAME_BUILDERS = {
+    "fig_age": (None, {"crime": app.TOTAL_CRIME}),
+    "fig_gender": (app.LEVEL_TOTAL, {}),
+    "fig_city_danger": (app.LEVEL_TOTAL, {"top_n": 10}),
+    "fig_children_bar": (app.LEVEL_TOTAL, {"top_n": 10}),
+    "fig_violence_women": (None, {}),
+}
+GEO_CITY_MODES = ["bundesland", "all", 10, 20, 50, 100]
+GEO_SAFETY_MODES = ["all", "unsafe", "safe"]
+PAGES = ["/", "/geo", "/crime", "/trends", "/temporal"]
+
+
+def _options(options):
+    return ",".join(f"{k}={v}" for k, v in options.items())
+
+
+def builder_cases():
+    """(name, zero-argument callable) for every figure builder and selection."""
+    for sel_name, key in SELECTIONS.items():
+        c = app.cube_view(*key)
+        for name in CUBE_BUILDERS:
+            yield f"{name}[{sel_name}]", lambda f=getattr(app, name), c=c: f(c)
+        for name, (level, options) in FRAME_BUILDERS.items():
+            yield (
+                f"{name}[{sel_name}]",
+                lambda f=getattr(app, name), d=app.filter_data(*key, level=level), o=options: f(d, **o),
+            )
+        d = app.filter_data(*key, level=app.LEVEL_TOTAL)
+        for top_n in (-1, 10):
+            yield (
+                f"fig_children_ranking[{sel_name},top_n={top_n}]",
+                lambda d=d, n=top_n: app.fig_children_ranking(d, top_n=n),
+            )
+
+    # every map view for the default selection
+    d = app.filter_data(*SELECTIONS[DEFAULT_SELECTION], level=app.LEVEL_TOTAL)
+    for city_mode in GEO_CITY_MODES:
+        for safety_mode in GEO_SAFETY_MODES:
+            options = {"city_mode": city_mode, "safety_mode": safety_mode}
+            yield (
+                f"fig_geo_map[{DEFAULT_SELECTION},{_options(options)}]",
+                lambda d=d, o=options: app.fig_geo_map(d, **o),
+            )
+    options = {"selected_state": "Bayern", "city_mode": "all", "age_group": "Kinder <14"}
+    yield (
+        f"fig_geo_map[{DEFAULT_SELECTION},{_options(options)}]",
+        lambda d=d, o=options: app.fig_geo_map(d, **o),
+    )
+
+
+def callback_cases():
+    """(name, zero-argument callable) for the server-side Dash callbacks."""
+    for page in PAGES:
+        yield f"render_page[{page}]", lambda p=page: app.render_page(p)
+        yield f"update_sidebar[{page}]", lambda p=page: app.update_sidebar(p)
+
+    for sel_name, (years, crimes, states) in SELECTIONS.items():
+        sel = json.dumps(app.selection_key(years or app.YEARS, crimes, states), ensure_ascii=False)
+
+        def case(name, *args, sel=sel, sel_name=sel_name):
+            return f"{name}[{sel_name}]", lambda: getattr(app, name)(sel, *args)
+
+        yield (
+            f"update_selection[{sel_name}]",
+            lambda y=years, c=crimes, s=states: app.update_selection(list(y), list(c), list(s), None),
+        )
+        yield case("update_overview_cards")
+        yield case("update_overview")
+        yield case("update_crime", app.TOTAL_CRIME)
+        yield case("update_crime_top5")
+        yield case("update_city_danger", 10, "OrRd")
+        yield case("update_trend_children_cities", -1, "dangerous", "Kinder <14", app.GEO_STATUS)
+        yield case("update_trend_violence_women")
+        yield case("update_temporal")
+        yield case("update_state_trend")
+        for state, city_mode in ((None, "bundesland"), (None, "all"), (None, 10), ("Bayern", "all")):
+            name, fn = case(
+                "update_geo_components", state, city_mode, "all", "all", app.GEO_STATUS, None
+            )
+            yield f"{name[:-1]},city_mode={city_mode},state={state}]", fn
+
+
+def reset_caches():
+    app._FIGURE_CACHE.clear()
+    app._FILTER_CACHE.clear()
+
+
+def measure(fn, repeat, reset=None):
+    """Median/min wall time, tracemalloc peak and serialized size of fn()."""
+    times = []
+    result = None
+    for _ in range(repeat):
+        if reset:
+            reset()
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+
+    if reset:
+        reset()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "median_ms": statistics.median(times) * 1000,
+        "min_ms": min(times) * 1000,
+        "peak_bytes": peak,
+        "size_bytes": len(to_json_plotly(result)),
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """{case: [regressed metric, ...]} against the baseline results."""
+    regressions = {}
+    for name, now in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        worse = []
+        if (
+            now["median_ms"] > before["median_ms"] * (1 + threshold)
+            and now["median_ms"] - before["median_ms"] > min_delta_ms
+        ):
+            worse.append("time")
+        if now["peak_bytes"] > before["peak_bytes"] * (1 + threshold):
+            worse.append("memory")
+        if now["size_bytes"] > before["size_bytes"] * (1 + threshold):
+            worse.append("size")
+        if worse:
+            regressions[name] = worse
+    return regressions
+
+
+def _change(now, before):
+    if not before:
+        return ""
+    return f"{100 * (now - before) / before:+.0f} %"
+
+
+def report(results, baseline, regressions):
+    width = max(len(name) for name in results)
+    print(f"{'Fall':<{width}}  {'Median ms':>10} {'Δ':>7}  {'Peak MB':>8} {'Δ':>7}  {'Größe KB':>9} {'Δ':>7}")
+    for name, now in results.items():
+        before = baseline.get(name, {})
+        flag = "  REGRESSION: " + ", ".join(regressions[name]) if name in regressions else ""
+        print(
+            f"{name:<{width}}  {now['median_ms']:>10.1f} {_change(now['median_ms'], before.get('median_ms')):>7}"
+            f"  {now['peak_bytes'] / 1e6:>8.2f} {_change(now['peak_bytes'], before.get('peak_bytes')):>7}"
+            f"  {now['size_bytes'] / 1e3:>9.1f} {_change(now['size_bytes'], before.get('size_bytes')):>7}"
+            f"{flag}"
+        )
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks für app.py")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Läufe pro Fall (Median)")
+    parser.add_argument("-k", "--filter", default=None, help="nur Fälle, deren Name auf diese Regex passt")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline-JSON")
+    parser.add_argument("--save", action="store_true", help="Ergebnis in die Baseline übernehmen (mit -k nur diese Fälle)")
+    parser.add_argument("--threshold", type=float, default=0.25, help="erlaubte Verschlechterung (0.25 = 25 %%)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="kleinere Zeitdifferenzen sind Rauschen")
+    parser.add_argument("--warm", action="store_true", help="Callbacks mit gefüllten Caches messen")
+    parser.add_argument("--json", default=None, help="Ergebnis zusätzlich in diese Datei schreiben")
+    args = parser.parse_args(argv)
+
+    app.ensure_data()
+    app.load_geo_data()
+    if app.GEO_STATUS != "ready":
+        parser.error("Geodaten konnten nicht geladen werden; die Geo-Fälle wären nur Platzhalter.")
+
+    pattern = re.compile(args.filter) if args.filter else None
+    reset = None if args.warm else reset_caches
+    results = {}
+    for group, cases, group_reset in (
+        ("Builder", builder_cases(), None),
+        ("Callbacks", callback_cases(), reset),
+    ):
+        print(f"{group} ...", flush=True)
+        for name, fn in cases:
+            if pattern and not pattern.search(name):
+                continue
+            results[name] = measure(fn, args.repeat, group_reset)
+
+    if not results:
+        parser.error("keine Fälle ausgewählt")
+
+    run = {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "warm": args.warm,
+            "startup": app.STARTUP_TIMES,
+        },
+        "results": results,
+    }
+
+    stored = load_baseline(args.baseline)
+    baseline = stored["results"] if stored else {}
+    regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+    print()
+    report(results, baseline, regressions)
+    print()
+    if stored is None and not args.save:
+        print(f"Keine Baseline unter {args.baseline}; mit --save anlegen.")
+    elif stored is not None:
+        print(
+            f"Baseline vom {stored['meta']['created']}: {len(regressions)} von "
+            f"{len(set(results) & set(baseline))} Fällen über {args.threshold:.0%} schlechter."
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(run, fh, ensure_ascii=False, indent=1)
+    if args.save:
+        # with -k only the selected cases are replaced; the others keep their stored results
+        saved = {"meta": run["meta"], "results": {**baseline, **results}}
+        with open(args.baseline, "w", encoding="utf-8") as fh:
+            json.dump(saved, fh, ensure_ascii=False, indent=1)
+        print(f"Baseline gespeichert: {args.baseline}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
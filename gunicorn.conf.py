@@ -0,0 +1,31 @@
+"""
+gunicorn settings for the dashboard:
+
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+Environment overrides: CRIME_DASH_BIND, CRIME_DASH_WORKERS, CRIME_DASH_THREADS,
+CRIME_DASH_TIMEOUT.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("CRIME_DASH_BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("CRIME_DASH_WORKERS", multiprocessing.cpu_count()))
+# threaded workers: while one request builds a figure, others are answered
+worker_class = "gthread"
+threads = int(os.environ.get("CRIME_DASH_THREADS", "4"))
+timeout = int(os.environ.get("CRIME_DASH_TIMEOUT", "120"))
+
+# import wsgi (and with it load all data) once in the master, then fork
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # objects created by gunicorn after wsgi.preload() should not be scanned
+    # (and thereby copied) by the workers' garbage collector either
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    server.log.info("Worker %s teilt %d eingefrorene Objekte", worker.pid, gc.get_freeze_count())
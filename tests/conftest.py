@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope="session")
+def app():
+    """app.py with the CSVs of the repository root loaded."""
+    cwd = os.getcwd()
+    # app.py reads the CSVs and .cache/ relative to the working directory
+    os.chdir(ROOT)
+    import app as module
+
+    module.ensure_data()
+    yield module
+    os.chdir(cwd)
@@ -0,0 +1,99 @@
+import base64
+import json
+import os
+import shutil
+import subprocess
+
+import numpy as np
+import pytest
+
+from conftest import ROOT
+
+NODE = shutil.which("node")
+
+# years, crimes, states: parents together with their children, 2022 without a
+# total and the "Sonstige ..." remainders all go through the levels
+SELECTIONS = [
+    ([], [], []),
+    ([2022], [], []),
+    ([2020, 2023], ["Raub auf Straßen"], ["Hessen"]),
+    ([2019], ["Gewaltkriminalität", "Raub auf Straßen", "Einfache KV"], []),
+    ([], ["Raub & Erpressung", "Handtaschenraub"], ["Bayern", "Berlin"]),
+    ([2021, 2022], ["Gewaltkriminalität"], []),
+    ([2022], ["Gewaltkriminalität", "Widerstand/Angriff Beamte"], ["Bayern"]),
+    ([2024], [], ["Saarland"]),
+    ([], ["Straftaten insgesamt", "Mord & Totschlag"], []),
+]
+
+RUN_JS = """
+const fs = require("fs");
+global.window = {dash_clientside: {no_update: null}};
+require(process.argv[1]);
+const f = window.dash_clientside.crime_cube;
+const inp = JSON.parse(fs.readFileSync(process.argv[2]));
+const out = inp.selections.map(([y, c, s]) => ({
+  cards: f.overviewCards(y, s, inp.cube),
+  top5: f.top5(y, c, s, inp.cube),
+  stateTrend: f.stateTrend(y, c, s, inp.cube),
+}));
+process.stdout.write(JSON.stringify(out));
+"""
+
+
+def plain(value):
+    """JSON value with plotly's typed arrays decoded, integral floats as ints and NaN as null."""
+    if isinstance(value, dict):
+        if "bdata" in value and "dtype" in value:
+            return plain(np.frombuffer(base64.b64decode(value["bdata"]), dtype=value["dtype"]).tolist())
+        return {k: plain(v) for k, v in value.items() if k != "template"}
+    if isinstance(value, (list, tuple)):
+        return [plain(v) for v in value]
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def assert_same(server, client, path="figure"):
+    if isinstance(server, dict) and isinstance(client, dict):
+        assert server.keys() == client.keys(), path
+        for key in server:
+            assert_same(server[key], client[key], f"{path}/{key}")
+    elif isinstance(server, list) and isinstance(client, list):
+        assert len(server) == len(client), path
+        for i, (s, c) in enumerate(zip(server, client)):
+            assert_same(s, c, f"{path}[{i}]")
+    elif isinstance(server, float) or isinstance(client, float):
+        assert client == pytest.approx(server), path
+    else:
+        assert server == client, path
+
+
+def as_json(figure):
+    import plotly.io as pio
+
+    return plain(json.loads(pio.to_json(figure, validate=False)))
+
+
+@pytest.mark.skipif(NODE is None, reason="node is not installed")
+def test_clientside_cube_matches_server(app, tmp_path):
+    payload = tmp_path / "in.json"
+    cube = app.client_cube_payload(app.CUBE)
+    payload.write_text(json.dumps({"selections": SELECTIONS, "cube": cube}, default=int))
+    script = os.path.join(ROOT, "assets", "clientside_cube.js")
+    result = subprocess.run(
+        [NODE, "-e", RUN_JS, script, str(payload)], capture_output=True, check=True, text=True
+    )
+
+    for (years, crimes, states), client in zip(SELECTIONS, json.loads(result.stdout)):
+        selection = app.update_selection(years, crimes, states, None)
+        cards = app.update_overview_cards(selection)
+        where = f"{years} {crimes} {states}"
+        assert list(cards[:5]) == client["cards"][:5], where
+        assert_same(as_json(cards[5]), plain(client["cards"][5]), f"{where} trend")
+        assert_same(as_json(cards[6]), plain(client["cards"][6]), f"{where} top5 states")
+        assert_same(as_json(app.update_crime_top5(selection)), plain(client["top5"]), f"{where} top5")
+        assert_same(
+            as_json(app.update_state_trend(selection)), plain(client["stateTrend"]), f"{where} state trend"
+        )
@@ -0,0 +1,77 @@
+import math
+
+import pandas as pd
+
+
+def source_rows(app, year):
+    """Fallstatus "insg." rows of one source CSV, with Straftat_kurz."""
+    raw = pd.read_csv(f"{year} Opfer.csv", sep=";", encoding="latin1")
+    raw.columns = [c.strip() for c in raw.columns]
+    raw = raw[raw["Fallstatus"] == "insg."].copy()
+    raw["Straftat_kurz"] = app.shorten_crime_names(raw["Straftat"]).astype(str)
+    raw["Bundesland"] = (raw["Gemeindeschluessel"] // 1000).map(app.STATE_MAP)
+    return raw
+
+
+def source_total(rows, straftat, by=None):
+    rows = rows[rows["Straftat_kurz"] == straftat]
+    if by is None:
+        return rows["Oper insgesamt"].sum()
+    return rows.groupby(by)["Oper insgesamt"].sum()
+
+
+def years_with_total(app):
+    return [y for y in app.DATA_YEARS if (source_rows(app, y)["Straftat_kurz"] == app.TOTAL_CRIME).any()]
+
+
+def test_frame_holds_only_source_rows(app):
+    expected = sum(len(source_rows(app, year)) for year in app.DATA_YEARS)
+    assert len(app.df) == expected
+    assert not set(app.df["Straftat_kurz"].unique()) & set(app.CRIME_REMAINDERS)
+
+
+def test_every_level_sums_to_source_total(app):
+    years = years_with_total(app)
+    assert 2022 not in years
+    for year in years:
+        rows = source_rows(app, year)
+        expected = source_total(rows, app.TOTAL_CRIME, by="Bundesland")
+        c = app.cube_view([year], [], [])
+        for level in app.CRIME_LEVELS:
+            got = c.at_level(level).sum_by("Bundesland").set_index("Bundesland")["Oper insgesamt"]
+            pd.testing.assert_series_equal(
+                got.sort_index(), expected.sort_index(), check_names=False, check_dtype=False, obj=f"{year} {level}"
+            )
+
+
+def test_parent_filter_sums_to_parent_on_every_level(app):
+    # the "Sonstige" remainder may be negative where the children list more
+    # victims than the parent (Gewaltkriminalität), but each level adds up
+    tree = app.CRIME_HIERARCHY
+    parents = [p for p in tree.remainders.values() if p != app.TOTAL_CRIME]
+    for year in app.DATA_YEARS:
+        rows = source_rows(app, year)
+        for parent in parents:
+            if not (rows["Straftat_kurz"] == parent).any():
+                continue
+            expected = source_total(rows, parent)
+            c = app.cube_view([year], [parent], [])
+            for level in app.CRIME_LEVELS:
+                assert c.at_level(level).totals() == expected, (year, parent, level)
+
+
+def test_year_without_total_is_left_out(app):
+    c = app.cube_view([2022], [], [])
+    assert not c.empty
+    assert c.at_level(app.LEVEL_TOTAL).empty
+    assert app.build_kpis(c)[:4] == (app.NO_TOTAL,) * 4
+
+    everything = app.cube_view([], [], [])
+    years = years_with_total(app)
+    total = sum(source_total(source_rows(app, y), app.TOTAL_CRIME) for y in years)
+    assert app.build_kpis(everything)[1] == app.format_int(round(total / len(years)))
+
+    trend = app.fig_trend(everything)
+    assert list(trend.data[0].x) == list(app.DATA_YEARS)
+    assert [math.isnan(v) for v in trend.data[0].y] == [y == 2022 for y in app.DATA_YEARS]
+    assert "2022" in trend.layout.annotations[0].text
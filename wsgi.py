@@ -0,0 +1,18 @@
+"""
+Production entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:server
+
+gunicorn.conf.py sets preload_app, so this module is imported once in the
+gunicorn master: preload() loads the data and the geo layers there, before the
+workers are forked, and every worker shares them copy-on-write instead of
+holding its own copy. Any other WSGI server can serve `server` as well; without
+a pre-fork master each process simply loads the data once on import.
+
+`python app.py` remains the single-process development server.
+"""
+from app import preload, server
+
+preload()
+
+__all__ = ["server"]